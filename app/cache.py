@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after they are stored.
+
+    Entries can carry tags such as ("club", 5) so that every entry depending on a row
+    can be dropped with one invalidate_tag call when that row is edited.
+
+    A value computed outside the lock can be outdated by an invalidation that runs while it is
+    being computed. Callers take generation() before computing and pass it to set, which then
+    drops the value if its key or any of its tags was invalidated (or the cache cleared) since.
+    """
+
+    def __init__(self, maxsize=128, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        # Son geçersiz kılmaların nesil numaraları: anahtar ve etiket başına, clear için tek sayı
+        self.current_generation = 0
+        self.key_invalidations = {}
+        self.tag_invalidations = {}
+        self.cleared = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self):
+        """Token to pass to set for a value that is about to be computed."""
+        with self.lock:
+            return self.current_generation
+
+    def set(self, key, value, tags=(), generation=None):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            if generation is not None and self._invalidated_since(generation, key, tags):
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (monotonic() + self.ttl, value, set(tags))
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate(self, key):
+        with self.lock:
+            self.current_generation += 1
+            self.key_invalidations[key] = self.current_generation
+            if key in self.entries:
+                self._remove(key)
+
+    def invalidate_tag(self, *tags):
+        with self.lock:
+            self.current_generation += 1
+            for tag in tags:
+                self.tag_invalidations[tag] = self.current_generation
+                for key in list(self.tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.current_generation += 1
+            self.cleared = self.current_generation
+            # clear her şeyi kapsadığı için önceki anahtar/etiket kayıtlarına artık gerek yok
+            self.key_invalidations.clear()
+            self.tag_invalidations.clear()
+            self.entries.clear()
+            self.tags.clear()
+
+    def stats(self):
+        with self.lock:
+            return {"size": len(self.entries), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses}
+
+    def _invalidated_since(self, generation, key, tags):
+        if self.cleared > generation or self.key_invalidations.get(key, 0) > generation:
+            return True
+        return any(self.tag_invalidations.get(tag, 0) > generation for tag in tags)
+
+    def _remove(self, key):
+        _, _, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
@@ -0,0 +1,59 @@
+from database import db
+
+# Oyuncunun kariyeri sezon ve kulüp bazında saklanır: maç ve kalesini gole kapatma sayıları
+# player_match_appearance satırlarından, goller goals tablosundan, asistler olaylardan gelir.
+REFRESH_PLAYER_CAREER_STATS_QUERY = '''
+DELETE FROM player_career_stats WHERE {where};
+
+INSERT INTO player_career_stats (player_id, season, club_id, matches, goals, assists, clean_sheets)
+SELECT player_id, season, club_id, SUM(matches), SUM(goals), SUM(assists), SUM(clean_sheets)
+FROM (
+    SELECT a.player_id, fm.season, a.club_id, 1 AS matches, 0 AS goals, 0 AS assists,
+           CASE WHEN (a.club_id = fm.home_club AND fm.goal_by_away_club = 0)
+                  OR (a.club_id = fm.away_club AND fm.goal_by_home_club = 0) THEN 1 ELSE 0 END AS clean_sheets
+    FROM player_match_appearance a
+    JOIN football_match fm ON fm.id = a.football_match_id
+    UNION ALL
+    SELECT g.player_id, fm.season, g.club_id, 0, 1, 0, 0
+    FROM goals g
+    JOIN football_match fm ON fm.id = g.football_match_id
+    WHERE NOT g.is_own_goal
+    UNION ALL
+    SELECT e.player_id, fm.season, e.club_id, 0, 0, 1, 0
+    FROM football_match_event e
+    JOIN football_match fm ON fm.id = e.football_match_id
+    WHERE e.modifier = 'assist'
+) career
+WHERE player_id IS NOT NULL AND {where}
+GROUP BY player_id, season, club_id;
+'''
+
+PLAYER_CAREER_TOTALS_QUERY = '''
+SELECT
+    COALESCE(SUM(matches), 0),
+    COALESCE(SUM(goals), 0),
+    COALESCE(SUM(assists), 0),
+    COALESCE(SUM(clean_sheets), 0)
+FROM player_career_stats
+WHERE player_id = %s;
+'''
+
+
+def refresh_player_career_stats(player_ids=None):
+    """Rebuilds the career rows of the given players, or of every player when None."""
+    if player_ids is None:
+        query = REFRESH_PLAYER_CAREER_STATS_QUERY.format(where="TRUE")
+        params = None
+    else:
+        player_ids = [int(player_id) for player_id in player_ids if player_id is not None]
+        if not player_ids:
+            return
+        query = REFRESH_PLAYER_CAREER_STATS_QUERY.format(where="player_id = ANY(%s)")
+        params = [player_ids, player_ids]
+
+    db.executeQuery(query, params=params, commit=1)
+
+
+def get_career_totals(player_id):
+    """(matches, goals, assists, clean_sheets) of the player over every season and club."""
+    return tuple(db.executeQuery(PLAYER_CAREER_TOTALS_QUERY, params=(player_id,))[0])
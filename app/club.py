@@ -1,210 +1,64 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, Flask
 from database import db
+from images import player_images
+from leaderboards import get_top_players
+from stats_page import match_page_cache
+from search import search_index
+from event import facet_cache
+from timeline import get_club_matches, invalidate_timelines
 from auth import isAdmin
 import traceback
-import csv
 import os
-from collections import Counter
 
 club_bp = Blueprint('club', __name__, template_folder="templates")
 
 app = Flask(__name__)  # Flask uygulaması
 
 def load_player_images(players):
-    all_ids = {p[0] for p in (players)}
-    player_data = {}
-    with open('app/static/images/player_images.csv', mode='r') as file:
-        for row in csv.DictReader(file):
-            dset_id = int(row['dataset_ID'])
-            if dset_id in all_ids:
-                player_data[dset_id] = row['link']
-    return player_data
+    return player_images.get_many(p[0] for p in players)
 
 # Oyuncu resimlerini yükle
 
 
-GOAL_QUERY = '''
-WITH params AS (
-    SELECT 
-        %s AS club_id
-),
-club_matches AS (
-    SELECT 
-        fm.id AS match_id,
-        CASE 
-            WHEN fm.home_club = params.club_id THEN 0 
-            WHEN fm.away_club = params.club_id THEN 1 
-        END AS team_type
-    FROM football_match fm, params
-    WHERE fm.home_club = params.club_id OR fm.away_club = params.club_id
-),
-filtered_events AS (
-    SELECT 
-        e.id AS event_id, 
-        e.club_id, 
-        e.player_id,
-        e.matchperiod, 
-        e.eventsec, 
-        e.action,
-        e.football_match_id,
-        CASE 
-            WHEN cm.team_type = 0 THEN fm.home_club
-            WHEN cm.team_type = 1 THEN fm.away_club
-        END AS team_id
-    FROM football_match_event e
-    JOIN club_matches cm ON e.football_match_id = cm.match_id
-    JOIN football_match fm ON e.football_match_id = fm.id
-    WHERE 
-        e.eventname = 'Save attempt'
-        AND e.is_success = FALSE
-        AND e.club_id = CASE 
-            WHEN cm.team_type = 0 THEN fm.away_club
-            WHEN cm.team_type = 1 THEN fm.home_club
-        END
-),
-goal_details AS (
-    SELECT 
-        e.id AS event_id,
-        e.player_id,
-        e.club_id,
-        e.matchperiod,
-        e.eventsec,
-        fe.team_id,
-        e.football_match_id,
-        CASE 
-            WHEN e.action = 'Penalty' THEN TRUE
-            ELSE FALSE
-        END AS is_penalty
-    FROM football_match_event e
-    JOIN filtered_events fe ON e.id = fe.event_id - 1
-    WHERE e.football_match_id = fe.football_match_id
-)
-SELECT 
-    gd.football_match_id AS match_id,
-    gd.player_id,
-    p.firstname || ' ' || p.lastname AS player_name,
-    p.country_id AS player_country_id,
-    gd.matchperiod,
-    gd.eventsec,
-    CASE 
-        WHEN gd.club_id = gd.team_id THEN FALSE
-        ELSE TRUE
-    END AS is_own_goal,
-    gd.is_penalty
-FROM goal_details gd
-JOIN player p ON gd.player_id = p.id
-ORDER BY gd.football_match_id, gd.eventsec;
+CLUB_DETAILS_QUERY = '''
+SELECT
+    c.id, c.name, c.officialname, c.country, s.stadium, co.id,
+    (array_agg(cs.competition ORDER BY cs.season DESC NULLS LAST, cs.matches DESC))[1],
+    s.city, s.id,
+    COALESCE(SUM(cs.matches), 0),
+    COALESCE(SUM(cs.wins), 0),
+    COALESCE(SUM(cs.losses), 0),
+    COALESCE(SUM(cs.goals_scored), 0),
+    COALESCE(SUM(cs.goals_conceded), 0),
+    COALESCE(SUM(cs.clean_sheets), 0)
+FROM club c
+LEFT JOIN stadiums s ON c.stadiums_id = s.id
+LEFT JOIN countries co ON c.country = co.country
+LEFT JOIN club_season_summary cs ON cs.club_id = c.id
+WHERE c.id = %s
+GROUP BY c.id, s.id, co.id;
 '''
 
-ASSIST_QUERY = '''
-    SELECT
-        p.id AS playerid,
-        fme.club_id AS club,
-        c.name AS clubname,
-        p.firstname || ' ' || p.lastname AS player_name,
-        p.country_id AS player_country_id
-    FROM football_match_event fme
-    JOIN player p ON p.id = fme.player_id
-    JOIN club c ON c.id = fme.club_id
-    WHERE c.id = %s AND fme.modifier = 'assist'
-
-'''
-
-MATCHES_QUERY = '''
-    SELECT
-        fm.id AS matchid,
-        fm.dateutc AS time,
-        hc.name AS home,
-        fm.goal_by_home_club || ':' || fm.goal_by_away_club AS score,
-        ac.name AS away,
-        hc.id AS home_id,
-        ac.id AS away_id
-    FROM football_match fm
-    JOIN club hc ON hc.id = fm.home_club
-    JOIN club ac ON ac.id = fm.away_club
-    WHERE hc.id = %s OR ac.id = %s
-    ORDER BY time DESC
-
-'''
+def get_match_history(id):
+    match_history = []
+    for match in get_club_matches(id):
+        score = None
+        if match["home_goals"] is not None and match["away_goals"] is not None:
+            score = f"{match['home_goals']}:{match['away_goals']}"
+        match_history.append((match["match_id"], match["date"], match["home_name"], score,
+                              match["away_name"], match["home_id"], match["away_id"]))
+    return match_history
 
 
 def get_top_scorers(id):
-   
-    goals = db.executeQuery(GOAL_QUERY, params=(id,))
-    player_count = Counter(goal[1] for goal in goals)  # goal[1] = player_id
-
-    # En çok yazılan ilk 5 player_id'yi ve tekrar sayılarını alıyoruz
-    top_5 = player_count.most_common(5)
-
-    # player_id -> player_name eşlemesini bulmak için bir dict oluşturuyoruz
-    player_names = {goal[1]: goal[2] for goal in goals}  # goal[2] = player_name
-    player_countries = {goal[1]: goal[3] for goal in goals}  # goal[5] = country_id
-
-    # İlk 5 oyuncunun id ve ismini alıp döndürüyoruz
-    result = [(player_id, player_names[player_id], count, player_countries[player_id]) for player_id, count in top_5]
-    return result
+    return get_top_players("club", id, "goals")
 
 def get_top_assists(id):
-   
-    assists = db.executeQuery(ASSIST_QUERY, params=(id,))
-    player_count = Counter(assist[0] for assist in assists)  # assist[0] = player_id
-
-    # En çok yazılan ilk 5 player_id'yi ve tekrar sayılarını alıyoruz
-    top_5 = player_count.most_common(5)
-
-    # player_id -> player_name eşlemesini bulmak için bir dict oluşturuyoruz
-    player_names = {assist[0]: assist[3] for assist in assists}  # assist[3] = player_name
-    player_countries = {assist[0]: assist[4] for assist in assists}  # assist[4] = country_id
-
-    # İlk 5 oyuncunun id ve ismini alıp döndürüyoruz
-    result = [(player_id, player_names[player_id], count, player_countries[player_id]) for player_id, count in top_5]
-    return result
-
-def get_top_contributions(goal_list, assist_list):
-
-    # Sözlük kullanarak oyuncuları id ile takip edelim
-    contributions = {}
-
-    # Gol katkılarını ekleyelim
-    for player_id, player_name, goals, player_country in goal_list:
-        if player_id not in contributions:
-            contributions[player_id] = {
-                "player_name": player_name,
-                "player_country": player_country,
-                "goals": goals,
-                "assists": 0,
-            }
-        else:
-            contributions[player_id]["goals"] += goals
-
-    # Asist katkılarını ekleyelim
-    for player_id, player_name, assists, player_country in assist_list:
-        if player_id not in contributions:
-            contributions[player_id] = {
-                "player_name": player_name,
-                "player_country": player_country,
-                "goals": 0,
-                "assists": assists,
-            }
-        else:
-            contributions[player_id]["assists"] += assists
-
-    # Toplam katkıyı hesapla ve listeye dönüştür
-    combined_list = [
-        (
-            player_id,
-            details["player_name"],
-            details["goals"] + details["assists"],
-            details["player_country"],
-        )
-        for player_id, details in contributions.items()
-    ]
-
-    # Toplam katkıya göre azalan sırada sırala
-    combined_list.sort(key=lambda x: x[2], reverse=True)
+    return get_top_players("club", id, "assists")
 
-    # İlk 5 oyuncuyu döndür
-    return combined_list[:5]
+def get_top_contributions(id):
+    # Gol + asist toplamı önceden hesaplanmış olarak tablodan okunur
+    return get_top_players("club", id, "contributions")
 
 
 @club_bp.route('/')
@@ -265,15 +119,7 @@ def get_clubs():
 def get_club(id):
     """Fetches and displays details of a single club by ID."""
     try:
-        query = """
-        SELECT c.id, c.name, c.officialname, c.country, s.stadium, co.id, fm.competition, s.city, s.id
-        FROM club c
-        LEFT JOIN stadiums s ON c.stadiums_id = s.id
-        LEFT JOIN countries co ON c.country = co.country
-        LEFT JOIN football_match fm ON c.id = home_club
-        WHERE c.id = %s;
-        """
-        club_data = db.executeQuery(query, params=(id,))
+        club_data = db.executeQuery(CLUB_DETAILS_QUERY, params=(id,))
         if not club_data:
             flash(f"Club with ID {id} not found.", 'danger')
             return redirect(url_for('club.get_clubs'))
@@ -290,47 +136,8 @@ def get_club(id):
             "sid": club_data[0][8]
         }
 
-        # Fetch additional statistics and players data
-        match_count = db.executeQuery("""
-            SELECT COUNT(*) FROM football_match 
-            WHERE home_club = %s OR away_club = %s;
-        """, params=(id, id))[0][0] or 0
-
-        win_count = db.executeQuery("""
-            SELECT COUNT(*) 
-            FROM football_match 
-            WHERE (home_club = %s AND winner = %s) OR (away_club = %s AND winner = %s);
-        """, params=(id, id, id, id))[0][0] or 0
-
-        loss_count = db.executeQuery("""
-            SELECT COUNT(*) 
-            FROM football_match 
-            WHERE (home_club = %s AND winner != %s) OR (away_club = %s AND winner != %s);
-        """, params=(id, id, id, id))[0][0] or 0
-
-        goal_scored = db.executeQuery("""
-            SELECT 
-                SUM(CASE WHEN home_club = %s THEN goal_by_home_club ELSE 0 END) + 
-                SUM(CASE WHEN away_club = %s THEN goal_by_away_club ELSE 0 END)
-            FROM football_match 
-            WHERE home_club = %s OR away_club = %s;
-        """, params=(id, id, id, id))[0][0] or 0
-
- 
-        goal_conceded = db.executeQuery("""
-            SELECT 
-                SUM(CASE WHEN home_club = %s THEN goal_by_away_club ELSE 0 END) + 
-                SUM(CASE WHEN away_club = %s THEN goal_by_home_club ELSE 0 END)
-            FROM football_match 
-            WHERE home_club = %s OR away_club = %s;
-        """, params=(id, id, id, id))[0][0] or 0
-
-        
-        cln_sheet = db.executeQuery("""
-            SELECT COUNT(*) 
-            FROM football_match 
-            WHERE (home_club = %s AND goal_by_away_club = 0) OR (away_club = %s AND goal_by_home_club = 0);
-        """, params=(id, id))[0][0] or 0
+        # Maç istatistikleri club_season_summary satırlarının toplamıdır
+        match_count, win_count, loss_count, goal_scored, goal_conceded, cln_sheet = club_data[0][9:15]
 
         # Top scorers, assists, and goal contributions
         top_scorers = get_top_scorers(id)
@@ -339,10 +146,10 @@ def get_club(id):
         top_assists = get_top_assists(id)
         assist_player_images = load_player_images(top_assists)
 
-        top_contributions = get_top_contributions(top_scorers, top_assists)
+        top_contributions = get_top_contributions(id)
         cont_player_images = load_player_images(top_contributions)
 
-        match_history = db.executeQuery(MATCHES_QUERY, params=(id, id))
+        match_history = get_match_history(id)
 
 
     except Exception as e:
@@ -386,6 +193,8 @@ def add_club():
             VALUES (%s, %s, %s, %s);
             """
             db.executeQuery(query, params=(name, officialname, country, stadiums_id), commit=1)
+            search_index.sync_new('club')
+            facet_cache.invalidate("clubs")
             flash('Club added successfully!', 'success')
             return redirect(url_for('club.get_clubs'))
         except Exception as e:
@@ -413,6 +222,10 @@ def edit_club(id):
             WHERE id = %s;
             """
             db.executeQuery(query, params=(name, officialname, country, stadiums_id, id), commit=1)
+            search_index.reload('club', id)
+            match_page_cache.invalidate_tag(("club", id))
+            invalidate_timelines()
+            facet_cache.invalidate("clubs")
             flash('Club updated successfully!', 'success')
             return redirect(url_for('club.get_clubs'))
         except Exception as e:
@@ -443,6 +256,10 @@ def delete_club(id):
     try:
         query = "DELETE FROM club WHERE id = %s;"
         db.executeQuery(query, params=(id,), commit=1)
+        search_index.remove('club', id)
+        match_page_cache.invalidate_tag(("club", id))
+        invalidate_timelines()
+        facet_cache.invalidate("clubs")
         flash('Club deleted successfully!', 'success')
     except Exception as e:
         print(f"Error deleting club: {e}")
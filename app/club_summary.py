@@ -0,0 +1,53 @@
+from database import db
+
+# Her maç iki satıra açılır (ev sahibi ve deplasman), kulüp/sezon/turnuva bazında toplanır.
+# Beraberlikte winner NULL olduğu için mağlubiyet sayılmaz.
+REFRESH_CLUB_SEASON_SUMMARY_QUERY = '''
+DELETE FROM club_season_summary WHERE {where};
+
+INSERT INTO club_season_summary (club_id, season, competition, matches, wins, losses,
+                                 goals_scored, goals_conceded, clean_sheets)
+SELECT
+    club_id,
+    season,
+    competition,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE winner = club_id),
+    COUNT(*) FILTER (WHERE winner <> club_id),
+    COALESCE(SUM(scored), 0),
+    COALESCE(SUM(conceded), 0),
+    COUNT(*) FILTER (WHERE conceded = 0)
+FROM (
+    SELECT home_club AS club_id, season, competition, winner,
+           goal_by_home_club AS scored, goal_by_away_club AS conceded
+    FROM football_match
+    UNION ALL
+    SELECT away_club, season, competition, winner, goal_by_away_club, goal_by_home_club
+    FROM football_match
+) sides
+WHERE club_id IS NOT NULL AND {where}
+GROUP BY club_id, season, competition;
+'''
+
+MATCH_CLUBS_QUERY = "SELECT home_club, away_club FROM football_match WHERE id = %s;"
+
+
+def refresh_club_season_summary(club_ids=None):
+    """Rebuilds the season summary rows of the given clubs, or of every club when None."""
+    if club_ids is None:
+        query = REFRESH_CLUB_SEASON_SUMMARY_QUERY.format(where="TRUE")
+        params = None
+    else:
+        club_ids = [int(club_id) for club_id in club_ids if club_id is not None]
+        if not club_ids:
+            return
+        query = REFRESH_CLUB_SEASON_SUMMARY_QUERY.format(where="club_id = ANY(%s)")
+        params = [club_ids, club_ids]
+
+    db.executeQuery(query, params=params, commit=1)
+
+
+def get_match_clubs(match_id):
+    """Home and away club of a match, read before an edit or delete changes them."""
+    rows = db.executeQuery(MATCH_CLUBS_QUERY, params=(match_id,))
+    return list(rows[0]) if rows else []
@@ -1,170 +1,28 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from auth import isAdmin
 from database import db
-from collections import Counter
-import csv
+from images import player_images
+from leaderboards import get_top_players
+from stats_page import match_page_cache
+from search import search_index
 
 
 country_bp = Blueprint('country', __name__, template_folder="templates")
 
 
 def load_player_images(players):
-    all_ids = {p[0] for p in (players)}
-    player_data = {}
-    with open('app/static/images/player_images.csv', mode='r') as file:
-        for row in csv.DictReader(file):
-            dset_id = int(row['dataset_ID'])
-            if dset_id in all_ids:
-                player_data[dset_id] = row['link']
-    return player_data
-
-
-GOAL_QUERY = '''
-WITH params AS (
-    SELECT 
-        %s AS country_id
-),
-country_players AS (
-    SELECT 
-        p.id AS player_id
-    FROM player p, params
-    WHERE p.country_id = params.country_id
-),
-filtered_events AS (
-    SELECT 
-        e.id AS event_id, 
-        e.club_id, 
-        e.player_id,
-        e.matchperiod, 
-        e.eventsec, 
-        e.action,
-        e.football_match_id
-    FROM football_match_event e
-    WHERE 
-        e.eventname = 'Save attempt'
-        AND e.is_success = FALSE
-),
-goal_details AS (
-    SELECT 
-        e.id AS event_id,
-        e.player_id,
-        e.club_id,
-        e.matchperiod,
-        e.eventsec,
-        e.football_match_id,
-        CASE 
-            WHEN e.action = 'Penalty' THEN TRUE
-            ELSE FALSE
-        END AS is_penalty
-    FROM football_match_event e
-    JOIN filtered_events fe ON e.id = fe.event_id - 1
-    WHERE e.football_match_id = fe.football_match_id
-),
-country_goals AS (
-    SELECT 
-        gd.football_match_id AS match_id,
-        gd.player_id,
-        gd.club_id,
-        gd.matchperiod,
-        gd.eventsec,
-        gd.is_penalty
-    FROM goal_details gd
-    JOIN country_players cp ON gd.player_id = cp.player_id
-)
-SELECT 
-    cg.player_id,
-    p.firstname || ' ' || p.lastname AS player_name
-FROM country_goals cg
-JOIN player p ON cg.player_id = p.id
-ORDER BY cg.match_id, cg.eventsec;
-'''
-
-ASSIST_QUERY = '''
-    SELECT
-        p.id AS playerid,
-        p.firstname || ' ' || p.lastname AS player_name
-    FROM football_match_event fme
-    JOIN player p ON p.id = fme.player_id
-    JOIN club c ON c.id = fme.club_id
-    WHERE p.country_id = %s AND fme.modifier = 'assist'
-
-'''
-
+    return player_images.get_many(p[0] for p in players)
 
 
 def get_top_scorers(id):
-   
-    goals = db.executeQuery(GOAL_QUERY, params=(id,))
-    player_count = Counter(goal[0] for goal in goals)  # goal[0] = player_id
-
-    # En çok yazılan ilk 5 player_id'yi ve tekrar sayılarını alıyoruz
-    top_5 = player_count.most_common(5)
-
-    # player_id -> player_name eşlemesini bulmak için bir dict oluşturuyoruz
-    player_names = {goal[0]: goal[1] for goal in goals}  # goal[2] = player_name
-
-    # İlk 5 oyuncunun id ve ismini alıp döndürüyoruz
-    result = [(player_id, player_names[player_id], count) for player_id, count in top_5]
-    return result
+    return get_top_players("country", id, "goals")
 
 def get_top_assists(id):
-   
-    assists = db.executeQuery(ASSIST_QUERY, params=(id,))
-    player_count = Counter(assist[0] for assist in assists)  # assist[0] = player_id
-
-    # En çok yazılan ilk 5 player_id'yi ve tekrar sayılarını alıyoruz
-    top_5 = player_count.most_common(5)
-
-    # player_id -> player_name eşlemesini bulmak için bir dict oluşturuyoruz
-    player_names = {assist[0]: assist[1] for assist in assists}  # assist[3] = player_name
-
-    # İlk 5 oyuncunun id ve ismini alıp döndürüyoruz
-    result = [(player_id, player_names[player_id], count) for player_id, count in top_5]
-    return result
-
-def get_top_contributions(goal_list, assist_list):
-
-    # Sözlük kullanarak oyuncuları id ile takip edelim
-    contributions = {}
-
-    # Gol katkılarını ekleyelim
-    for player_id, player_name, goals in goal_list:
-        if player_id not in contributions:
-            contributions[player_id] = {
-                "player_name": player_name,
-                "goals": goals,
-                "assists": 0,
-            }
-        else:
-            contributions[player_id]["goals"] += goals
-
-    # Asist katkılarını ekleyelim
-    for player_id, player_name, assists in assist_list:
-        if player_id not in contributions:
-            contributions[player_id] = {
-                "player_name": player_name,
-                "goals": 0,
-                "assists": assists,
-            }
-        else:
-            contributions[player_id]["assists"] += assists
-
-    # Toplam katkıyı hesapla ve listeye dönüştür
-    combined_list = [
-        (
-            player_id,
-            details["player_name"],
-            details["goals"] + details["assists"],
-        )
-        for player_id, details in contributions.items()
-    ]
-
-    # Toplam katkıya göre azalan sırada sırala
-    combined_list.sort(key=lambda x: x[2], reverse=True)
-
-    # İlk 5 oyuncuyu döndür
-    return combined_list[:5]
+    return get_top_players("country", id, "assists")
 
+def get_top_contributions(id):
+    # Gol + asist toplamı önceden hesaplanmış olarak tablodan okunur
+    return get_top_players("country", id, "contributions")
 
 
 @country_bp.route('/')
@@ -240,7 +98,7 @@ def get_country(id):
         top_assists = get_top_assists(id)
         assist_player_images = load_player_images(top_assists)
 
-        top_contributions = get_top_contributions(top_scorers, top_assists)
+        top_contributions = get_top_contributions(id)
         cont_player_images = load_player_images(top_contributions)
 
         print(top_scorers)
@@ -271,6 +129,7 @@ def add_country():
             VALUES (%s, %s, %s);
             """
             db.executeQuery(query, params=(name, capital_city, region), commit=1)
+            search_index.sync_new('country')
             flash('Country added successfully!', 'success')
             return redirect(url_for('country.get_countries'))
         except Exception as e:
@@ -294,6 +153,8 @@ def edit_country(id):
             WHERE id = %s;
             """
             db.executeQuery(query, params=(name, capital_city, region, id), commit=1)
+            search_index.reload('country', id)
+            match_page_cache.invalidate_tag(("country", id))
             flash('Country updated successfully!', 'success')
             return redirect(url_for('country.get_countries'))
         except Exception as e:
@@ -321,6 +182,8 @@ def delete_country(id):
     try:
         query = "DELETE FROM countries WHERE id = %s;"
         db.executeQuery(query, params=(id,), commit=1)
+        search_index.remove('country', id)
+        match_page_cache.invalidate_tag(("country", id))
         flash('Country deleted successfully!', 'success')
     except Exception as e:
         print(f"Error deleting country: {e}")
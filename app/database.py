@@ -1,6 +1,12 @@
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from time import perf_counter
+from uuid import uuid4
 from os.path import join, dirname, abspath
 from os import environ
+from flask import g, has_app_context
 from werkzeug.security import generate_password_hash
 
 class Database:
@@ -9,21 +15,123 @@ class Database:
     DATA_PATH = join(dirname(APP_PATH), '..', 'data')
     QPATH = join(APP_PATH, 'queries')
 
-    def __init__(self):
-        database_url = f"postgresql://{environ.get('POSTGRES_USER')}:{environ.get('POSTGRES_PASSWORD')}@db:{environ.get('POSTGRES_PORT', '5432')}/{environ.get('POSTGRES_DB')}"
-        
-        self.conn = psycopg2.connect(database_url)
-        self.cur = self.conn.cursor()
+    def __init__(self, minconn=None, maxconn=None):
+        self.database_url = f"postgresql://{environ.get('POSTGRES_USER')}:{environ.get('POSTGRES_PASSWORD')}@db:{environ.get('POSTGRES_PORT', '5432')}/{environ.get('POSTGRES_DB')}"
+        self.minconn = int(minconn or environ.get('POSTGRES_POOL_MIN', 2))
+        self.maxconn = int(maxconn or environ.get('POSTGRES_POOL_MAX', 10))
+
+        self.pool = ThreadedConnectionPool(self.minconn, self.maxconn, self.database_url)
+        # Havuz dolduğunda beklemek yerine hata verir; bu yüzden çağıranlar önce burada sıraya girer
+        self.slots = BoundedSemaphore(self.maxconn)
+        # App context dışındaki (worker thread, komut satırı) alımlar en fazla bu kadar saniye bekler
+        self.checkoutTimeout = float(environ.get('POSTGRES_CHECKOUT_TIMEOUT', 30))
+
+        self.metricsLock = Lock()
+        self.inUse = 0
+        # Havuzda bekleyen açık bağlantılar; havuz açılışta minconn bağlantı kurar
+        self.idle = self.minconn
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkoutTime = 0.0
+        self.maxCheckoutTime = 0.0
 
         self.add_default_user()
 
+    def getConnection(self, timeout=None):
+        """Checks a connection out of the pool, waiting for a free slot if all are in use.
+
+        With a timeout, raises PoolError if no slot frees up within that many seconds.
+        """
+        start = perf_counter()
+        with self.metricsLock:
+            self.waiting += 1
+        try:
+            acquired = self.slots.acquire(timeout=timeout)
+        finally:
+            with self.metricsLock:
+                self.waiting -= 1
+        if not acquired:
+            raise PoolError(f"no pooled connection became free within {timeout} seconds")
+
+        try:
+            conn = self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+        elapsed = perf_counter() - start
+        with self.metricsLock:
+            # Havuz yalnızca boşta bağlantısı yokken yenisini açar
+            self.idle = max(0, self.idle - 1)
+            self.inUse += 1
+            self.checkouts += 1
+            self.checkoutTime += elapsed
+            self.maxCheckoutTime = max(self.maxCheckoutTime, elapsed)
+        return conn
+
+    def putConnection(self, conn, close=False):
+        """Returns a connection to the pool, ending any transaction it left open."""
+        if not conn.closed and not close:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+        try:
+            self.pool.putconn(conn, close=close or bool(conn.closed))
+        finally:
+            with self.metricsLock:
+                self.inUse -= 1
+                # Havuz minconn üzerindeki bağlantıları kapatır; yalnızca açık kalanlar boşta bekler
+                if not conn.closed:
+                    self.idle += 1
+            self.slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Yields a pooled connection.
+
+        Inside a Flask app context the connection is checked out once and kept on `g`
+        until teardown; anywhere else it goes back to the pool when the block exits, and the
+        checkout gives up after `checkoutTimeout` seconds so a worker thread cannot wait forever
+        on a request thread that is waiting for it.
+        """
+        if has_app_context():
+            conn = g.get('db_conn')
+            if conn is not None and conn.closed:
+                self.putConnection(g.pop('db_conn'), close=True)
+                conn = None
+            if conn is None:
+                conn = g.db_conn = self.getConnection()
+            yield conn
+        else:
+            conn = self.getConnection(timeout=self.checkoutTimeout)
+            try:
+                yield conn
+            finally:
+                self.putConnection(conn)
+
+    def releaseConnection(self, exception=None):
+        """Teardown hook that hands the request's connection back to the pool."""
+        conn = g.pop('db_conn', None)
+        if conn is not None:
+            self.putConnection(conn)
+
     def refreshDatabaseConnection(self):
-        self.cur.close()
-        self.conn.close()
-        database_url = f"postgresql://{environ.get('POSTGRES_USER')}:{environ.get('POSTGRES_PASSWORD')}@db:{environ.get('POSTGRES_PORT', '5432')}/{environ.get('POSTGRES_DB')}"
-        self.conn = psycopg2.connect(database_url)
-        
-        self.cur = self.conn.cursor()
+        if has_app_context():
+            self.releaseConnection()
+
+    def getPoolMetrics(self):
+        with self.metricsLock:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "in_use": self.inUse,
+                "idle": self.idle,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "avg_checkout_ms": round(self.checkoutTime / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_checkout_ms": round(self.maxCheckoutTime * 1000, 3)
+            }
 
     def getData(self, queryFile, params):
         with open(join(self.QPATH, queryFile), 'r') as f:
@@ -32,28 +140,54 @@ class Database:
         return data
 
     def executeQuery(self, query, params=None, getData=0, commit=0):
-        self.cur = self.conn.cursor()
         data = None
 
-        try:
-            self.cur.execute(query, params)
-            if commit == 1:
-                self.conn.commit()
-                return
-            else:
-                if getData == 1:
-                    data = self.cur.fetchone()
-                    if data is not None:
-                        data = data[0]
+        with self.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(query, params)
+                if commit == 1:
+                    conn.commit()
+                    return
                 else:
-                    data = self.cur.fetchall()
-        except psycopg2.Error as Error:
-            self.conn.rollback()
-            raise ValueError(f"""An error has been occured --> {Error}\nThis is the query:\n\t{query}""")
+                    if getData == 1:
+                        data = cur.fetchone()
+                        if data is not None:
+                            data = data[0]
+                    else:
+                        data = cur.fetchall()
+            except psycopg2.Error as Error:
+                conn.rollback()
+                raise ValueError(f"""An error has been occured --> {Error}\nThis is the query:\n\t{query}""")
+            finally:
+                cur.close()
+                return data
+
+    def streamQuery(self, query, params=None, itersize=2000):
+        """Yields the rows of a query through a server-side (named) cursor.
+
+        Only `itersize` rows are held in memory at a time. The cursor runs on its own pooled
+        connection rather than the request's, so it can outlive the view in a streamed response;
+        the connection goes back to the pool when the generator is exhausted or closed.
+        """
+        conn = self.getConnection()
+        try:
+            cur = conn.cursor(name=f"stream_{uuid4().hex}")
+            cur.itersize = itersize
+            try:
+                cur.execute(query, params)
+                yield from cur
+            except psycopg2.Error as Error:
+                raise ValueError(f"""An error has been occured --> {Error}\nThis is the query:\n\t{query}""")
+            finally:
+                if not conn.closed:
+                    try:
+                        cur.close()
+                    except psycopg2.Error:
+                        pass
         finally:
-            self.cur.close()
-            return data
-        
+            self.putConnection(conn)
+
     def add_default_user(self):
         password = generate_password_hash('123')
         role = 1
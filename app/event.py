@@ -1,139 +1,336 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
+from os import environ
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+from time import perf_counter
+from io import StringIO
+import csv
+import json
 from database import db
+from cache import LRUCache
 from auth import isAdmin, loginRequired
+from stats_page import refresh_match_team_stats, refresh_player_match_appearance, match_page_cache
+from goals import refresh_goals
+from heatmap import heatmap_cache
+from leaderboards import refresh_leaderboards, get_match_players
+from career_stats import refresh_player_career_stats
+from event_import import import_events, EVENT_IMPORT_COLUMNS
 
 event_bp = Blueprint('event', __name__, template_folder="templates")
 
+# Filtre seçenekleri tek taramada hesaplanır; GROUPING() hangi sütuna ait olduğunu söyler
+EVENT_FACETS_QUERY = '''
+SELECT GROUPING(eventname, action, modifier), COALESCE(eventname, action, modifier), COUNT(*)
+FROM football_match_event
+GROUP BY GROUPING SETS ((eventname), (action), (modifier))
+HAVING COALESCE(eventname, action, modifier) IS NOT NULL
+ORDER BY 2;
+'''
+
+FACET_GROUPS = {3: "eventname", 5: "action", 6: "modifier"}
+
+# "facets" olay yazımlarında, "clubs" kulüp yazımlarında temizlenir
+facet_cache = LRUCache(maxsize=2, ttl=float(environ.get('EVENT_FACETS_TTL', 3600)))
+
+
+def get_event_facets():
+    """Distinct eventname, action and modifier values with their row counts, as {facet: {value: count}}."""
+    facets = facet_cache.get("facets")
+    if facets is None:
+        generation = facet_cache.generation()
+        facets = {name: {} for name in FACET_GROUPS.values()}
+        for grouping, value, count in db.executeQuery(EVENT_FACETS_QUERY):
+            facets[FACET_GROUPS[grouping]][value] = count
+        facet_cache.set("facets", facets, generation=generation)
+    return facets
+
+
+EVENTS_PAGE_SIZE = 100
+
+# Liste sayfası ve dışa aktarma aynı sorguları ve sıralamayı kullanır; filtreler {conditions} yerine gelir.
+# Maçlı olaylar indeks sırasıyla (en yeni maç önce) okunur, maçı olmayan olaylar onlardan sonra gelir.
+EVENT_LIST_QUERY = """
+SELECT e.id, c.name AS club_name, f.dateutc AS match_date,
+       p.firstname || ' ' || p.lastname AS player_name,
+       e.matchperiod, e.eventsec, e.eventname, e.action, e.modifier,
+       e.x_begin, e.y_begin, e.x_end, e.y_end, e.is_success, f.id AS match_id
+FROM football_match_event e
+JOIN football_match f ON e.football_match_id = f.id
+LEFT JOIN club c ON e.club_id = c.id
+LEFT JOIN player p ON e.player_id = p.id
+WHERE {conditions}
+ORDER BY f.dateutc DESC, f.id DESC, e.eventsec ASC, e.id ASC
+"""
+
+# Aynı sütunlar; f hep NULL olduğu için maç tarihi filtreleri bu olayları eler
+UNMATCHED_EVENT_LIST_QUERY = """
+SELECT e.id, c.name AS club_name, f.dateutc AS match_date,
+       p.firstname || ' ' || p.lastname AS player_name,
+       e.matchperiod, e.eventsec, e.eventname, e.action, e.modifier,
+       e.x_begin, e.y_begin, e.x_end, e.y_end, e.is_success, f.id AS match_id
+FROM football_match_event e
+LEFT JOIN football_match f ON e.football_match_id = f.id
+LEFT JOIN club c ON e.club_id = c.id
+LEFT JOIN player p ON e.player_id = p.id
+WHERE e.football_match_id IS NULL AND {conditions}
+ORDER BY e.eventsec ASC, e.id ASC
+"""
+
+EVENT_FIELDS = ("id", "club_name", "match_date", "player_name", "matchperiod", "eventsec", "eventname", "action",
+                "modifier", "x_begin", "y_begin", "x_end", "y_end", "is_success", "match_id")
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_CHUNK_ROWS = 1000
+
+
+def event_to_dict(row):
+    return dict(zip(EVENT_FIELDS, row))
+
+
+def build_event_filters(args):
+    """SQL conditions (to be joined with AND) and their params for the event list filters in `args`."""
+    conditions = ["TRUE"]
+    params = []
+
+    club_id = args.get('club')
+    date_from = args.get('date_from')
+    date_to = args.get('date_to')
+    player_name = args.get('player_name')
+    match_period = args.get('match_period')
+    event_sec_start = args.get('event_sec_start', type=float)
+    event_sec_end = args.get('event_sec_end', type=float)
+    event_name = args.get('event_name')
+    action = args.get('action')
+    modifier = args.get('modifier')
+    is_success = args.get('is_success')
+
+    if club_id:
+        conditions.append("c.id = %s")
+        params.append(club_id)
+    if date_from:
+        conditions.append("f.dateutc >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("f.dateutc <= %s")
+        params.append(date_to)
+    if player_name:
+        conditions.append("LOWER(p.firstname || ' ' || p.lastname) LIKE %s")
+        params.append(f"%{player_name.lower()}%")
+    if match_period:
+        conditions.append("e.matchperiod = %s")
+        params.append(match_period)
+    if event_sec_start is not None:
+        conditions.append("e.eventsec >= %s")
+        params.append(event_sec_start)
+    if event_sec_end is not None:
+        conditions.append("e.eventsec <= %s")
+        params.append(event_sec_end)
+    if event_name:
+        conditions.append("e.eventname = %s")
+        params.append(event_name)
+    if action:
+        conditions.append("e.action = %s")
+        params.append(action)
+    if modifier:
+        conditions.append("e.modifier = %s")
+        params.append(modifier)
+    for point in ("begin", "end"):
+        coordinate_conditions(conditions, params, point,
+                              args.get(f'x_{point}_start', type=float), args.get(f'x_{point}_end', type=float),
+                              args.get(f'y_{point}_start', type=float), args.get(f'y_{point}_end', type=float))
+    if is_success in ["0", "1"]:
+        conditions.append("e.is_success = %s")
+        params.append(is_success)
+
+    return conditions, params
+
+
+def generate_event_export(export_format, conditions, params):
+    """Yields the matching events as CSV or NDJSON text, EXPORT_CHUNK_ROWS rows per chunk.
+
+    Rows come from a server-side cursor, so memory stays flat however many events match. Events
+    without a match follow the others, as in the list.
+    """
+    queries = [query.format(conditions=" AND ".join(conditions)) + ";"
+               for query in (EVENT_LIST_QUERY, UNMATCHED_EVENT_LIST_QUERY)]
+    rows = (row for query in queries for row in db.streamQuery(query, params, itersize=EXPORT_CHUNK_ROWS * 5))
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(EVENT_FIELDS)
+
+    for count, row in enumerate(rows, 1):
+        if export_format == "csv":
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(event_to_dict(row), default=datetime.isoformat))
+            buffer.write("\n")
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_event_cursor(event):
+    """Opaque cursor pointing after `event` in (match date DESC, match id DESC, eventsec, event id) order.
+
+    Events without a match come last; their cursor has no match date or id.
+    """
+    match_date = event["match_date"].isoformat() if event["match_date"] else None
+    key = [match_date, event["match_id"], event["eventsec"], event["id"]]
+    return urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_event_cursor(cursor):
+    """(match_date, match_id, eventsec, event_id) of a cursor, or None when it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        match_date, match_id, eventsec, event_id = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if match_date is not None:
+            match_date, match_id = datetime.fromisoformat(match_date), int(match_id)
+        return match_date, match_id, None if eventsec is None else float(eventsec), int(event_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def event_position_condition(eventsec, event_id):
+    """Condition (and params) for the events of the same match that come after (eventsec, event_id)."""
+    if eventsec is None:
+        return "e.eventsec IS NULL AND e.id > %s", [event_id]
+    return "(e.eventsec > %s OR (e.eventsec = %s AND e.id > %s) OR e.eventsec IS NULL)", [eventsec, eventsec, event_id]
+
+
+def coordinate_box(x_start, x_end, y_start, y_end):
+    """Corners (x0, y0, x1, y1) of the rectangle the bounds describe, open sides unbounded.
+
+    None unless both axes are bounded and no range is inverted: a point with a NULL coordinate never
+    falls in a box, and box() swaps inverted corners, so only then does the box match exactly the
+    rows the separate range predicates would.
+    """
+    if (x_start is None and x_end is None) or (y_start is None and y_end is None):
+        return None
+    if (x_start is not None and x_end is not None and x_start > x_end) or \
+            (y_start is not None and y_end is not None and y_start > y_end):
+        return None
+    return (
+        float('-inf') if x_start is None else x_start,
+        float('-inf') if y_start is None else y_start,
+        float('inf') if x_end is None else x_end,
+        float('inf') if y_end is None else y_end,
+    )
+
+
+def coordinate_conditions(conditions, params, point, x_start, x_end, y_start, y_end):
+    """Adds the begin or end coordinate filters, as one GiST-indexed box test when that is exact."""
+    # Koordinat aralıkları mümkünse dikdörtgen olarak GiST point indeksleriyle aranır
+    box = coordinate_box(x_start, x_end, y_start, y_end)
+    if box:
+        conditions.append(f"point(e.x_{point}, e.y_{point}) <@ box(point(%s, %s), point(%s, %s))")
+        params.extend(box)
+        return
+    for column, operator, value in ((f"x_{point}", ">=", x_start), (f"x_{point}", "<=", x_end),
+                                    (f"y_{point}", ">=", y_start), (f"y_{point}", "<=", y_end)):
+        if value is not None:
+            conditions.append(f"e.{column} {operator} %s")
+            params.append(value)
+
+
+def get_club_options():
+    clubs = facet_cache.get("clubs")
+    if clubs is None:
+        generation = facet_cache.generation()
+        clubs = [{"id": row[0], "name": row[1]} for row in db.executeQuery("SELECT id, name FROM club ORDER BY name;")]
+        facet_cache.set("clubs", clubs, generation=generation)
+    return clubs
+
+
+def get_event_match_id(id):
+    return db.executeQuery("SELECT football_match_id FROM football_match_event WHERE id = %s;", params=(id,), getData=1)
+
+def refresh_match_data(*match_ids):
+    """Brings the per-match derived tables up to date after events of these matches changed."""
+    match_ids = sorted({int(match_id) for match_id in match_ids if match_id is not None})
+    if not match_ids:
+        return
+    players = get_match_players(match_ids)
+    refresh_goals(match_ids)
+    refresh_match_team_stats(match_ids)
+    refresh_player_match_appearance(match_ids)
+    refresh_leaderboards(players)
+    refresh_player_career_stats(players)
+    match_page_cache.invalidate_tag(*[("match", match_id) for match_id in match_ids])
+    heatmap_cache.clear()
+    facet_cache.invalidate("facets")
+
 @event_bp.route('/')
 @loginRequired
 def get_events():
     """Fetches and displays a list of all events with optional filters."""
     try:
-        club_id = request.args.get('club')
-        date_from = request.args.get('date_from') 
-        date_to = request.args.get('date_to') 
-        player_name = request.args.get('player_name')
-        match_period = request.args.get('match_period')
-        event_sec_start = request.args.get('event_sec_start', type=float)
-        event_sec_end = request.args.get('event_sec_end', type=float)
-        event_name = request.args.get('event_name')
-        action = request.args.get('action')
-        modifier = request.args.get('modifier')
-        x_begin_start = request.args.get('x_begin_start', type=float)
-        x_begin_end = request.args.get('x_begin_end', type=float)
-        y_begin_start = request.args.get('y_begin_start', type=float)
-        y_begin_end = request.args.get('y_begin_end', type=float)
-        x_end_start = request.args.get('x_end_start', type=float)
-        x_end_end = request.args.get('x_end_end', type=float)
-        y_end_start = request.args.get('y_end_start', type=float)
-        y_end_end = request.args.get('y_end_end', type=float)
-        is_success = request.args.get('is_success')
-
-        # Temel sorgu
-        query = """
-        SELECT e.id, c.name AS club_name, f.dateutc AS match_date, 
-               p.firstname || ' ' || p.lastname AS player_name,
-               e.matchperiod, e.eventsec, e.eventname, e.action, e.modifier,
-               e.x_begin, e.y_begin, e.x_end, e.y_end, e.is_success
-        FROM football_match_event e
-        LEFT JOIN club c ON e.club_id = c.id
-        LEFT JOIN football_match f ON e.football_match_id = f.id
-        LEFT JOIN player p ON e.player_id = p.id
-        WHERE 1=1
-        """
-        params = []
-        if club_id:
-            query += " AND c.id = %s"
-            params.append(club_id)
-        if date_from:
-            query += " AND f.dateutc >= %s"
-            params.append(date_from)
-        if date_to:
-            query += " AND f.dateutc <= %s"
-            params.append(date_to)
-        if player_name:
-            query += " AND LOWER(p.firstname || ' ' || p.lastname) LIKE %s"
-            params.append(f"%{player_name.lower()}%")
-        if match_period:
-            query += " AND e.matchperiod = %s"
-            params.append(match_period)
-        if event_sec_start is not None:
-            query += " AND e.eventsec >= %s"
-            params.append(event_sec_start)
-        if event_sec_end is not None:
-            query += " AND e.eventsec <= %s"
-            params.append(event_sec_end)
-        if event_name:
-            query += " AND e.eventname = %s"
-            params.append(event_name)
-        if action:
-            query += " AND e.action = %s"
-            params.append(action)
-        if modifier:
-            query += " AND e.modifier = %s"
-            params.append(modifier)
-        if x_begin_start is not None:
-            query += " AND e.x_begin >= %s"
-            params.append(x_begin_start)
-        if x_begin_end is not None:
-            query += " AND e.x_begin <= %s"
-            params.append(x_begin_end)
-        if y_begin_start is not None:
-            query += " AND e.y_begin >= %s"
-            params.append(y_begin_start)
-        if y_begin_end is not None:
-            query += " AND e.y_begin <= %s"
-            params.append(y_begin_end)
-        if x_end_start is not None:
-            query += " AND e.x_end >= %s"
-            params.append(x_end_start)
-        if x_end_end is not None:
-            query += " AND e.x_end <= %s"
-            params.append(x_end_end)
-        if y_end_start is not None:
-            query += " AND e.y_end >= %s"
-            params.append(y_end_start)
-        if y_end_end is not None:
-            query += " AND e.y_end <= %s"
-            params.append(y_end_end)
-        if is_success in ["0", "1"]:
-            query += " AND e.is_success = %s"
-            params.append(is_success)
-
-        query += " ORDER BY f.dateutc DESC, e.eventsec ASC LIMIT 100;"
-        events = db.executeQuery(query, params)
-
-        event_names = [row[0] for row in db.executeQuery("SELECT DISTINCT eventname FROM football_match_event")]
-        actions = [row[0] for row in db.executeQuery("SELECT DISTINCT action FROM football_match_event WHERE action IS NOT NULL")]
-        modifiers = [row[0] for row in db.executeQuery("SELECT DISTINCT modifier FROM football_match_event WHERE modifier IS NOT NULL")]
+        conditions, params = build_event_filters(request.args)
+        cursor = decode_event_cursor(request.args.get('cursor'))
 
-        clubs = [{"id": row[0], "name": row[1]} for row in db.executeQuery("SELECT id, name FROM club ORDER BY name;")]
-        events = [
-            {
-                "id": event[0],
-                "club_name": event[1],
-                "match_date": event[2],
-                "player_name": event[3],
-                "matchperiod": event[4],
-                "eventsec": event[5],
-                "eventname": event[6],
-                "action": event[7],
-                "modifier": event[8],
-                "x_begin": event[9],
-                "y_begin": event[10],
-                "x_end": event[11],
-                "y_end": event[12],
-                "is_success": event[13],
-            }
-            for event in events
-        ]
+        # Keyset sayfalama: önceki sayfanın son satırından sonrası okunur, OFFSET kullanılmaz
+        events = []
+        if not cursor or cursor[0] is not None:
+            matched_conditions, matched_params = list(conditions), list(params)
+            if cursor:
+                match_date, match_id, eventsec, event_id = cursor
+                same_match, same_match_params = event_position_condition(eventsec, event_id)
+                matched_conditions.append(f"((f.dateutc, f.id) < (%s, %s) OR (f.dateutc = %s AND f.id = %s AND {same_match}))")
+                matched_params.extend([match_date, match_id, match_date, match_id, *same_match_params])
+            query = EVENT_LIST_QUERY.format(conditions=" AND ".join(matched_conditions)) + " LIMIT %s;"
+            events = db.executeQuery(query, matched_params + [EVENTS_PAGE_SIZE + 1])
+
+        # Maçlı olaylar sayfayı doldurmadıysa maçı olmayan olaylarla devam edilir
+        if len(events) <= EVENTS_PAGE_SIZE:
+            if cursor and cursor[0] is None:
+                same_match, same_match_params = event_position_condition(cursor[2], cursor[3])
+                conditions.append(same_match)
+                params.extend(same_match_params)
+            query = UNMATCHED_EVENT_LIST_QUERY.format(conditions=" AND ".join(conditions)) + " LIMIT %s;"
+            events += db.executeQuery(query, params + [EVENTS_PAGE_SIZE + 1 - len(events)])
+
+        facets = get_event_facets()
+        event_names = list(facets["eventname"])
+        actions = list(facets["action"])
+        modifiers = list(facets["modifier"])
+
+        clubs = get_club_options()
+        events = [event_to_dict(event) for event in events]
+
+        next_url = None
+        if len(events) > EVENTS_PAGE_SIZE:
+            events = events[:EVENTS_PAGE_SIZE]
+            next_url = url_for('event.get_events', **{**request.args.to_dict(), 'cursor': encode_event_cursor(events[-1])})
+        filter_args = {key: value for key, value in request.args.to_dict().items() if key != 'cursor'}
+        first_url = url_for('event.get_events', **filter_args) if cursor else None
+        export_urls = {export_format: url_for('event.export_events', **{**filter_args, 'format': export_format}) for export_format in EXPORT_FORMATS}
         
-        return render_template('event/index.html', events=events, clubs=clubs, event_names=event_names, actions=actions, modifiers=modifiers, filters=request.args)
+        return render_template('event/index.html', events=events, clubs=clubs, event_names=event_names, actions=actions, modifiers=modifiers, facet_counts=facets, filters=request.args, next_url=next_url, first_url=first_url, export_urls=export_urls)
 
     except Exception as e:
         flash(f"Error: {str(e)}", "danger")
         return redirect(url_for('event.get_events'))
 
+@event_bp.route('/export')
+@loginRequired
+def export_events():
+    """Streams every event matching the list filters as CSV (default) or NDJSON (?format=ndjson)."""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unknown export format: {export_format}"}), 400
+
+    conditions, params = build_event_filters(request.args)
+    response = Response(stream_with_context(generate_event_export(export_format, conditions, params)),
+                        mimetype=EXPORT_FORMATS[export_format])
+    response.headers["Content-Disposition"] = f"attachment; filename=events.{export_format}"
+    return response
+
 @event_bp.route('/<int:id>')
 @loginRequired
 def get_event(id):
@@ -202,6 +399,7 @@ def add_event():
             """
             db.executeQuery(query, params=(club_id, football_match_id, player_id, matchperiod, eventsec,
                                            eventname, action, modifier, x_begin, y_begin, x_end, y_end, is_success), commit=1)
+            refresh_match_data(football_match_id)
             flash('Event added successfully!', 'success')
             return redirect(url_for('event.get_events'))
         except Exception as e:
@@ -213,6 +411,29 @@ def add_event():
     players = db.executeQuery("SELECT id, firstname || ' ' || lastname AS fullname FROM player ORDER BY firstname;")
     return render_template('event/add.html', clubs=clubs, matches=matches, players=players)
 
+@event_bp.route('/import', methods=['GET', 'POST'])
+@isAdmin
+def upload_events():
+    """Bulk imports events from an uploaded CSV and shows the import report."""
+    report = None
+    error = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            error = "Choose a CSV file to import."
+        else:
+            try:
+                report = import_events(upload.stream, strict=request.form.get('strict') == 'on')
+                start = perf_counter()
+                refresh_match_data(*report["matches"])
+                report["refresh_seconds"] = perf_counter() - start
+            except Exception as e:
+                print(f"Error importing events: {e}")
+                error = str(e)
+
+    columns = [column for column, _, _ in EVENT_IMPORT_COLUMNS]
+    return render_template('event/import.html', report=report, error=error, columns=columns)
+
 @event_bp.route('/edit/<int:id>', methods=['GET', 'POST'])
 @isAdmin
 def edit_event(id):
@@ -232,6 +453,7 @@ def edit_event(id):
             x_end = float(request.form['x_end'])
             y_end = float(request.form['y_end'])
             is_success = request.form.get('is_success') == 'on'
+            old_match_id = get_event_match_id(id)
 
             query = """
             UPDATE football_match_event
@@ -241,6 +463,7 @@ def edit_event(id):
             """
             db.executeQuery(query, params=(club_id, football_match_id, player_id, matchperiod, eventsec, eventname,
                                            action, modifier, x_begin, y_begin, x_end, y_end, is_success, id), commit=1)
+            refresh_match_data(old_match_id, football_match_id)
             flash('Event updated successfully!', 'success')
             return redirect(url_for('event.get_events'))
         except Exception as e:
@@ -281,8 +504,10 @@ def edit_event(id):
 def delete_event(id):
     """Deletes an event."""
     try:
+        match_id = get_event_match_id(id)
         query = "DELETE FROM football_match_event WHERE id = %s;"
         db.executeQuery(query, params=(id,), commit=1)
+        refresh_match_data(match_id)
         flash('Event deleted successfully!', 'success')
     except Exception as e:
         print(f"Error deleting event: {e}")
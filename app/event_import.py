@@ -0,0 +1,202 @@
+import csv
+import psycopg2
+from time import perf_counter
+from database import db
+
+# football_match_event sütunları init.sql'deki sırayla: (sütun, SQL türü, sınır). Sınır metinde
+# azami uzunluk (VARCHAR), sayılarda CHECK (sütun >= 0) kısıtıdır.
+EVENT_IMPORT_COLUMNS = (
+    ("id", "integer", None),
+    ("club_id", "integer", None),
+    ("football_match_id", "integer", None),
+    ("player_id", "integer", None),
+    ("matchperiod", "text", 50),
+    ("eventsec", "double precision", 0),
+    ("eventname", "text", 255),
+    ("action", "text", 255),
+    ("modifier", "text", 255),
+    ("x_begin", "smallint", 0),
+    ("y_begin", "smallint", 0),
+    ("x_end", "double precision", 0),
+    ("y_end", "double precision", 0),
+    ("is_success", "boolean", None),
+)
+
+# Yabancı anahtarlar: sütun -> başvurduğu tablo
+EVENT_IMPORT_REFERENCES = {"club_id": "club", "football_match_id": "football_match", "player_id": "player"}
+
+REJECT_REPORT_LIMIT = 100
+
+# Dosya metin sütunlu geçici tabloya COPY ile akar; satır numarası dosyadaki sırayı tutar
+CREATE_STAGING_QUERY = '''
+CREATE TEMP TABLE event_import_staging (
+    row_number BIGSERIAL PRIMARY KEY,
+    {columns}
+) ON COMMIT DROP;
+'''
+
+# Türüne uymayan değerler hata vermek yerine NULL olur ve satır reddedilir (pg_input_is_valid, PostgreSQL 16+)
+CREATE_TYPED_QUERY = '''
+CREATE TEMP TABLE event_import_typed ON COMMIT DROP AS
+SELECT parsed.*, COUNT(*) OVER (PARTITION BY id) AS id_uses
+FROM (SELECT row_number, {columns} FROM event_import_staging) parsed;
+'''
+
+# Tüm kontroller tek taramada yapılır; concat_ws tutmayan kontrollerin NULL'larını atlar
+REJECTS_QUERY = '''
+CREATE TEMP TABLE event_import_rejects ON COMMIT DROP AS
+SELECT row_number, reasons
+FROM (
+    SELECT s.row_number, concat_ws('; ', {checks}) AS reasons
+    FROM event_import_staging s
+    JOIN event_import_typed t USING (row_number)
+) checked
+WHERE reasons <> '';
+'''
+
+REJECT_SUMMARY_QUERY = '''
+SELECT (SELECT COUNT(*) FROM event_import_staging), (SELECT COUNT(*) FROM event_import_rejects);
+'''
+
+REJECT_SAMPLE_QUERY = '''
+SELECT row_number, reasons FROM event_import_rejects ORDER BY row_number LIMIT %s;
+'''
+
+# Dizi önce dosyadaki en büyük kimliğin ötesine alınır, böylece üretilen değerler sonraki satırların
+# açık kimlikleriyle çakışmaz. nextval select listesinde ORDER BY'dan önce çalıştığı için sıralama
+# alt sorguda yapılır; kimliği olmayan satırlar dizi değerini dosya sırasıyla alır.
+MERGE_QUERY = '''
+SELECT setval('football_match_event_id_seq',
+              GREATEST((SELECT MAX(id) FROM event_import_typed),
+                       (SELECT MAX(id) FROM football_match_event),
+                       (SELECT last_value FROM football_match_event_id_seq)));
+
+INSERT INTO football_match_event (id, {columns})
+SELECT COALESCE(t.id, nextval('football_match_event_id_seq')), {columns}
+FROM (
+    SELECT *
+    FROM event_import_typed t
+    WHERE NOT EXISTS (SELECT 1 FROM event_import_rejects r WHERE r.row_number = t.row_number)
+    ORDER BY t.row_number
+) t;
+'''
+
+IMPORTED_MATCHES_QUERY = '''
+SELECT DISTINCT t.football_match_id
+FROM event_import_typed t
+WHERE NOT EXISTS (SELECT 1 FROM event_import_rejects r WHERE r.row_number = t.row_number);
+'''
+
+
+def read_import_header(stream):
+    """Column names of the CSV header line of `stream`, checked against the event table."""
+    line = stream.readline()
+    if isinstance(line, bytes):
+        line = line.decode('utf-8-sig')
+    header = [name.strip().lower() for name in next(csv.reader([line]), [])]
+
+    known = {column[0] for column in EVENT_IMPORT_COLUMNS}
+    unknown = [name for name in header if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown columns in header: {', '.join(unknown)}")
+    if len(set(header)) != len(header):
+        raise ValueError("Header repeats a column")
+    if "football_match_id" not in header:
+        raise ValueError("Header must contain football_match_id")
+    return header
+
+
+def typed_column(column, kind):
+    """Staging column cast to its table type, or NULL where the value is not valid for that type."""
+    if kind == "text":
+        return column
+    value = f"NULLIF(btrim({column}), '')"
+    return f"CASE WHEN pg_input_is_valid({value}, '{kind}') THEN {value}::{kind} END AS {column}"
+
+
+def import_checks():
+    """(reason, condition) pairs; a row is rejected for every condition it meets.
+
+    `s` is the raw staging row and `t` the same row parsed (NULL where a value does not parse or
+    does not fit its type). Together they cover the column types and lengths, CHECK constraints and
+    foreign keys of football_match_event, plus ids that are taken or repeated in the file.
+    """
+    checks = [("football_match_id is missing", "NULLIF(btrim(s.football_match_id), '') IS NULL")]
+    for column, kind, limit in EVENT_IMPORT_COLUMNS:
+        if kind == "text":
+            checks.append((f"{column} is longer than {limit} characters", f"length(s.{column}) > {limit}"))
+            continue
+        checks.append((f"{column} is not a valid {kind}",
+                       f"NULLIF(btrim(s.{column}), '') IS NOT NULL AND t.{column} IS NULL"))
+        if limit is not None:
+            checks.append((f"{column} must be >= {limit}", f"t.{column} < {limit}"))
+    for column, table in EVENT_IMPORT_REFERENCES.items():
+        checks.append((f"{column} does not exist in {table}",
+                       f"t.{column} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table} x WHERE x.id = t.{column})"))
+    checks.append(("id already exists", "EXISTS (SELECT 1 FROM football_match_event x WHERE x.id = t.id)"))
+    checks.append(("id is repeated in the file", "t.id IS NOT NULL AND t.id_uses > 1"))
+    return checks
+
+
+def build_rejects_query():
+    checks = ",\n           ".join(f"CASE WHEN {condition} THEN '{reason}' END" for reason, condition in import_checks())
+    return REJECTS_QUERY.format(checks=checks)
+
+
+def import_events(stream, strict=False):
+    """Loads a CSV in the football_match_event column layout (header line first) into the table.
+
+    The file is streamed with COPY into a staging table of text columns, every row is validated in
+    set form, and the valid rows are inserted in file order, all in one transaction. Rows without an
+    id get one from the sequence. With `strict`, any rejected row cancels the whole import.
+
+    Returns a report dict: total rows, imported rows, rejected count with the first
+    REJECT_REPORT_LIMIT (row number, reasons) pairs, the affected match ids, and per-phase timings. The
+    caller refreshes the derived tables of `matches` (event.refresh_match_data).
+    """
+    start = perf_counter()
+    header = read_import_header(stream)
+    columns = [column for column, _, _ in EVENT_IMPORT_COLUMNS[1:]]
+
+    conn = db.getConnection()
+    try:
+        cur = conn.cursor()
+        cur.execute(CREATE_STAGING_QUERY.format(columns=",\n    ".join(f"{column} TEXT" for column, _, _ in EVENT_IMPORT_COLUMNS)))
+        cur.copy_expert(f"COPY event_import_staging ({', '.join(header)}) FROM STDIN WITH (FORMAT csv)", stream)
+        copied = perf_counter()
+
+        cur.execute(CREATE_TYPED_QUERY.format(columns=", ".join(typed_column(column, kind) for column, kind, _ in EVENT_IMPORT_COLUMNS)))
+        cur.execute(build_rejects_query())
+        cur.execute(REJECT_SUMMARY_QUERY)
+        total, rejected = cur.fetchone()
+        cur.execute(REJECT_SAMPLE_QUERY, (REJECT_REPORT_LIMIT,))
+        rejects = cur.fetchall()
+        validated = perf_counter()
+
+        imported, matches = 0, []
+        if total > rejected and not (strict and rejected):
+            cur.execute(IMPORTED_MATCHES_QUERY)
+            matches = [row[0] for row in cur.fetchall()]
+            cur.execute(MERGE_QUERY.format(columns=", ".join(columns)))
+            imported = total - rejected
+        conn.commit()
+        merged = perf_counter()
+        cur.close()
+    except psycopg2.Error as Error:
+        raise ValueError(f"Event import failed --> {Error}")
+    finally:
+        db.putConnection(conn)
+
+    elapsed = merged - start
+    return {
+        "total": total,
+        "imported": imported,
+        "rejected": rejected,
+        "rejects": rejects,
+        "matches": matches,
+        "copy_seconds": copied - start,
+        "validate_seconds": validated - copied,
+        "merge_seconds": merged - validated,
+        "seconds": elapsed,
+        "rows_per_second": total / elapsed if elapsed else 0.0,
+    }
@@ -0,0 +1,58 @@
+from database import db
+
+# Gol, rakip kalecinin başarısız "Save attempt" olayından hemen önceki olaydır (id - 1).
+# Bu çıkarım bir kez yapılıp goals tablosunda saklanır; sayfalar doğrudan tablodan okur.
+REFRESH_GOALS_QUERY = '''
+DELETE FROM goals WHERE {where};
+
+INSERT INTO goals (event_id, football_match_id, player_id, club_id, team_id, matchperiod, eventsec,
+                   is_own_goal, is_penalty, scorer_country_id)
+SELECT
+    e.id,
+    e.football_match_id,
+    e.player_id,
+    e.club_id,
+    t.team_id,
+    e.matchperiod,
+    e.eventsec,
+    e.club_id IS DISTINCT FROM t.team_id AS is_own_goal,
+    COALESCE(e.action = 'Penalty', FALSE) AS is_penalty,
+    p.country_id
+FROM football_match_event s
+JOIN football_match fm ON fm.id = s.football_match_id
+JOIN football_match_event e ON e.id = s.id - 1 AND e.football_match_id = s.football_match_id
+JOIN player p ON p.id = e.player_id
+CROSS JOIN LATERAL (
+    SELECT CASE WHEN s.club_id = fm.away_club THEN fm.home_club ELSE fm.away_club END AS team_id
+) t
+WHERE
+    s.eventname = 'Save attempt'
+    AND s.is_success = FALSE
+    AND s.club_id IN (fm.home_club, fm.away_club)
+    AND {event_where}
+ON CONFLICT (event_id) DO NOTHING;
+'''
+
+UPDATE_SCORER_COUNTRY_QUERY = '''
+UPDATE goals g
+SET scorer_country_id = p.country_id
+FROM player p
+WHERE p.id = g.player_id AND g.player_id = %s;
+'''
+
+
+def refresh_goals(match_ids=None):
+    """Rebuilds the goals of the given matches, or of every match when None."""
+    if match_ids is None:
+        query = REFRESH_GOALS_QUERY.format(where="TRUE", event_where="TRUE")
+        params = None
+    else:
+        query = REFRESH_GOALS_QUERY.format(where="football_match_id = ANY(%s)", event_where="s.football_match_id = ANY(%s)")
+        params = [list(match_ids), list(match_ids)]
+
+    db.executeQuery(query, params=params, commit=1)
+
+
+def update_scorer_country(player_id):
+    """Keeps goals.scorer_country_id in step after a player's country changes."""
+    db.executeQuery(UPDATE_SCORER_COUNTRY_QUERY, params=(player_id,), commit=1)
@@ -0,0 +1,125 @@
+from flask import Blueprint, request, jsonify
+from os import environ
+import numpy as np
+from database import db
+from cache import LRUCache
+
+heatmap_bp = Blueprint('heatmap', __name__)
+
+HEATMAP_POINTS_QUERY = """
+SELECT e.{x}, e.{y}
+FROM football_match_event e
+JOIN football_match f ON e.football_match_id = f.id
+WHERE e.{x} IS NOT NULL AND e.{y} IS NOT NULL
+"""
+
+DEFAULT_BINS = (21, 14)
+MAX_BINS = 100
+
+# Izgaralar filtre anahtarıyla saklanır; olay yazımlarında tamamen temizlenir
+heatmap_cache = LRUCache(maxsize=int(environ.get('HEATMAP_CACHE_SIZE', 256)),
+                         ttl=float(environ.get('HEATMAP_CACHE_TTL', 600)))
+
+
+def parse_id_list(name):
+    """Integer ids of a filter given either repeated (?match=1&match=2) or comma separated."""
+    ids = set()
+    for value in request.args.getlist(name):
+        for part in value.split(','):
+            if part.strip():
+                ids.add(int(part))
+    return tuple(sorted(ids))
+
+
+def parse_heatmap_filters():
+    """Reads the heatmap filters from the query string into a hashable, normalized key."""
+    coordinates = request.args.get('coordinates', 'begin')
+    if coordinates not in ('begin', 'end'):
+        raise ValueError("coordinates must be 'begin' or 'end'")
+
+    x_bins = request.args.get('x_bins', DEFAULT_BINS[0], type=int)
+    y_bins = request.args.get('y_bins', DEFAULT_BINS[1], type=int)
+    if not (0 < x_bins <= MAX_BINS and 0 < y_bins <= MAX_BINS):
+        raise ValueError(f"x_bins and y_bins must be between 1 and {MAX_BINS}")
+
+    return (
+        ('coordinates', coordinates),
+        ('x_bins', x_bins),
+        ('y_bins', y_bins),
+        ('player', parse_id_list('player')),
+        ('club', parse_id_list('club')),
+        ('match', parse_id_list('match')),
+        ('season', parse_id_list('season')),
+        ('event_name', request.args.get('event_name') or None),
+        ('action', request.args.get('action') or None),
+    )
+
+
+def compute_heatmap(filters):
+    """Bins the matching event coordinates into an y_bins x x_bins grid over the 0-100 pitch."""
+    options = dict(filters)
+    x, y = ('x_begin', 'y_begin') if options['coordinates'] == 'begin' else ('x_end', 'y_end')
+
+    query = HEATMAP_POINTS_QUERY.format(x=x, y=y)
+    params = []
+    if options['player']:
+        query += " AND e.player_id = ANY(%s)"
+        params.append(list(options['player']))
+    if options['club']:
+        query += " AND e.club_id = ANY(%s)"
+        params.append(list(options['club']))
+    if options['match']:
+        query += " AND e.football_match_id = ANY(%s)"
+        params.append(list(options['match']))
+    if options['season']:
+        query += " AND f.season = ANY(%s)"
+        params.append(list(options['season']))
+    if options['event_name']:
+        query += " AND e.eventname = %s"
+        params.append(options['event_name'])
+    if options['action']:
+        query += " AND e.action = %s"
+        params.append(options['action'])
+
+    points = np.array(db.executeQuery(query, params=params) or [], dtype=float).reshape(-1, 2)
+    grid, _, _ = np.histogram2d(points[:, 0], points[:, 1],
+                                bins=(options['x_bins'], options['y_bins']), range=((0, 100), (0, 100)))
+    # histogram2d x'i satırlara koyar; sahada satırlar y eksenine karşılık gelsin diye çevrilir
+    grid = grid.T.astype(int)
+
+    return {
+        "coordinates": options['coordinates'],
+        "x_bins": options['x_bins'],
+        "y_bins": options['y_bins'],
+        "count": int(grid.sum()),
+        "max": int(grid.max()) if grid.size else 0,
+        "grid": grid.tolist(),
+        "filters": {name: list(value) if isinstance(value, tuple) else value
+                    for name, value in filters if name not in ('coordinates', 'x_bins', 'y_bins')},
+    }
+
+
+@heatmap_bp.route('/heatmap')
+def get_heatmap():
+    """Event density over the pitch as a grid of counts; raw points never leave the server.
+
+    Filters: player, club, match, season (ids, repeated or comma separated), event_name,
+    action, coordinates=begin|end and the grid size x_bins/y_bins. grid[row][col] counts the
+    events whose y falls in row and x in col, both over 0-100.
+    """
+    try:
+        filters = parse_heatmap_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    heatmap = heatmap_cache.get(filters)
+    if heatmap is None:
+        generation = heatmap_cache.generation()
+        heatmap = compute_heatmap(filters)
+        heatmap_cache.set(filters, heatmap, generation=generation)
+
+    response = jsonify(heatmap)
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    response.add_etag()
+    return response.make_conditional(request)
@@ -0,0 +1,48 @@
+import csv
+from os import stat
+from os.path import join, dirname, abspath
+from threading import Lock
+
+PLAYER_IMAGES_PATH = join(dirname(abspath(__file__)), 'static', 'images', 'player_images.csv')
+
+
+class ImageIndex:
+    """dataset_ID -> image link map of a CSV file.
+
+    The file is parsed on first use and parsed again only after its mtime changes, so
+    editing the CSV takes effect without a restart.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.links = {}
+        self.mtime = None
+        self.lock = Lock()
+
+    def refresh(self):
+        try:
+            mtime = stat(self.path).st_mtime_ns
+        except OSError as e:
+            print(f"Error reading image index {self.path}: {e}")
+            return self.links
+
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    links = {}
+                    with open(self.path, mode='r') as file:
+                        for row in csv.DictReader(file):
+                            links[int(row['dataset_ID'])] = row['link']
+                    self.links, self.mtime = links, mtime
+        return self.links
+
+    def get(self, player_id):
+        return self.refresh().get(player_id)
+
+    def get_many(self, player_ids):
+        """Links of the given ids that have an image, as {id: link}."""
+        links = self.refresh()
+        return {player_id: links[player_id] for player_id in player_ids if player_id in links}
+
+
+player_images = ImageIndex(PLAYER_IMAGES_PATH)
@@ -0,0 +1,91 @@
+from database import db
+
+# Oyuncu başına gol/asist toplamları kulüp ve ülke bazında saklanır; detay sayfaları ilk N'i
+# doğrudan indeksten okur. Kendi kalesine atılan goller oyuncunun golü sayılmaz.
+CONTRIBUTIONS_SOURCE = '''
+    SELECT g.club_id, g.player_id, 1 AS goals, 0 AS assists
+    FROM goals g
+    WHERE NOT g.is_own_goal
+    UNION ALL
+    SELECT e.club_id, e.player_id, 0, 1
+    FROM football_match_event e
+    WHERE e.modifier = 'assist'
+'''
+
+REFRESH_LEADERBOARDS_QUERY = '''
+DELETE FROM club_leaderboard WHERE {where};
+DELETE FROM country_leaderboard WHERE {where};
+
+INSERT INTO club_leaderboard (club_id, player_id, goals, assists, contributions)
+SELECT club_id, player_id, SUM(goals), SUM(assists), SUM(goals) + SUM(assists)
+FROM ({source}) c
+WHERE club_id IS NOT NULL AND player_id IS NOT NULL AND {where}
+GROUP BY club_id, player_id;
+
+INSERT INTO country_leaderboard (country_id, player_id, goals, assists, contributions)
+SELECT p.country_id, player_id, SUM(goals), SUM(assists), SUM(goals) + SUM(assists)
+FROM ({source}) c
+JOIN player p ON p.id = c.player_id
+WHERE club_id IS NOT NULL AND p.country_id IS NOT NULL AND {where}
+GROUP BY p.country_id, player_id;
+'''
+
+# Tablodaki mevcut goller ve görünümler düzenlemeden önceki oyuncuları da kapsar
+MATCH_PLAYERS_QUERY = '''
+SELECT player_id FROM player_match_appearance WHERE football_match_id = ANY(%s)
+UNION
+SELECT player_id FROM goals WHERE football_match_id = ANY(%s)
+UNION
+SELECT player_id FROM football_match_event WHERE football_match_id = ANY(%s) AND player_id IS NOT NULL;
+'''
+
+TOP_PLAYERS_QUERY = '''
+SELECT l.player_id, p.firstname || ' ' || p.lastname AS player_name, l.{column}, p.country_id
+FROM {table} l
+JOIN player p ON p.id = l.player_id
+WHERE l.{key} = %s AND l.{column} > 0
+ORDER BY l.{column} DESC, l.player_id
+LIMIT %s;
+'''
+
+LEADERBOARDS = {"club": ("club_leaderboard", "club_id"), "country": ("country_leaderboard", "country_id")}
+LEADERBOARD_COLUMNS = ("goals", "assists", "contributions")
+
+
+def refresh_leaderboards(player_ids=None):
+    """Rebuilds the club and country leaderboard rows of the given players, or of everyone when None."""
+    if player_ids is None:
+        query = REFRESH_LEADERBOARDS_QUERY.format(where="TRUE", source=CONTRIBUTIONS_SOURCE)
+        params = None
+    else:
+        player_ids = [int(player_id) for player_id in player_ids if player_id is not None]
+        if not player_ids:
+            return
+        query = REFRESH_LEADERBOARDS_QUERY.format(where="player_id = ANY(%s)", source=CONTRIBUTIONS_SOURCE)
+        params = [player_ids] * 4
+
+    db.executeQuery(query, params=params, commit=1)
+
+
+def get_match_players(match_ids):
+    """Players whose leaderboard rows may change when the given matches change.
+
+    Call it before the goals and appearances of the matches are refreshed so that a player
+    edited out of a match is still included.
+    """
+    match_ids = list(match_ids)
+    if not match_ids:
+        return []
+    return [row[0] for row in db.executeQuery(MATCH_PLAYERS_QUERY, params=(match_ids, match_ids, match_ids))]
+
+
+def get_top_players(board, key, column, limit=5):
+    """Top `limit` players of a club or country by goals, assists or contributions.
+
+    Rows are (player_id, player_name, count, player_country_id).
+    """
+    if column not in LEADERBOARD_COLUMNS:
+        raise ValueError(f"Unknown leaderboard column: {column}")
+    table, key_column = LEADERBOARDS[board]
+    query = TOP_PLAYERS_QUERY.format(table=table, key=key_column, column=column)
+    return db.executeQuery(query, params=(key, limit))
@@ -1,6 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from database import db
 from auth import isAdmin
+from stats_page import refresh_match_team_stats, match_page_cache
+from goals import refresh_goals
+from timeline import invalidate_timelines
+from heatmap import heatmap_cache
+from event import facet_cache
+from club_summary import refresh_club_season_summary, get_match_clubs
+from leaderboards import refresh_leaderboards, get_match_players
+from career_stats import refresh_player_career_stats
 
 match_bp = Blueprint('match', __name__, template_folder="templates")
 
@@ -134,6 +142,10 @@ def add_match():
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
             """
             db.executeQuery(query, params=(dateutc, competition, season, stadiums_id, home_club, away_club, winner, goal_by_home_club, goal_by_away_club), commit=1)
+            # Yeni maç kulüplerin son 5 maç listesine girebilir
+            match_page_cache.invalidate_tag(("club", int(home_club)), ("club", int(away_club)))
+            invalidate_timelines()
+            refresh_club_season_summary([home_club, away_club])
             flash('Match added successfully!', 'success')
             return redirect(url_for('match.get_matches'))
         except Exception as e:
@@ -165,7 +177,20 @@ def edit_match(id):
             SET dateutc = %s, competition = %s, season = %s, stadiums_id = %s, home_club = %s, away_club = %s, winner = %s, goal_by_home_club = %s, goal_by_away_club = %s
             WHERE id = %s;
             """
+            previous_clubs = get_match_clubs(id)
             db.executeQuery(query, params=(dateutc, competition, season, stadiums_id, home_club, away_club, winner, goal_by_home_club, goal_by_away_club, id), commit=1)
+            # Ev sahibi/deplasman değişmiş olabilir, maç istatistikleri yeniden hesaplanır
+            players = get_match_players([id])
+            refresh_goals([id])
+            refresh_match_team_stats([id])
+            refresh_leaderboards(players)
+            refresh_player_career_stats(players)
+            match_page_cache.invalidate_tag(("match", id), ("club", int(home_club)), ("club", int(away_club)))
+            invalidate_timelines()
+            heatmap_cache.clear()
+            facet_cache.invalidate("facets")
+            # Eski ve yeni kulüplerin sezon özetleri güncellenir
+            refresh_club_season_summary(set(previous_clubs + [int(home_club), int(away_club)]))
             flash('Match updated successfully!', 'success')
             return redirect(url_for('match.get_matches'))
         except Exception as e:
@@ -199,8 +224,18 @@ def edit_match(id):
 def delete_match(id):
     """Deletes a match."""
     try:
+        clubs = get_match_clubs(id)
+        players = get_match_players([id])
         query = "DELETE FROM football_match WHERE id = %s;"
         db.executeQuery(query, params=(id,), commit=1)
+        match_page_cache.invalidate_tag(("match", id))
+        invalidate_timelines()
+        heatmap_cache.clear()
+        # Silinen maçın olayları da silindiği için olay sayıları değişir
+        facet_cache.invalidate("facets")
+        refresh_club_season_summary(clubs)
+        refresh_leaderboards(players)
+        refresh_player_career_stats(players)
         flash('Match deleted successfully!', 'success')
     except Exception as e:
         print(f"Error deleting match: {e}")
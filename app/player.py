@@ -1,36 +1,28 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, Flask
 from database import db
-import csv
+from images import player_images
+from stats_page import match_page_cache
+from search import search_index
+from goals import update_scorer_country
+from leaderboards import refresh_leaderboards
+from career_stats import get_career_totals
 import traceback
-from club import GOAL_QUERY
 from auth import isAdmin
 
 
-PLAYER_ASSIST_QUERY = '''
-    SELECT
-        DISTINCT fme.id AS assists, fme.football_match_id AS match_id
-    FROM football_match_event fme
-    JOIN player p ON p.id = fme.player_id
-    WHERE %s = fme.player_id AND fme.modifier = 'assist'
-'''
-
-CLN_SHEET_QUERY = '''
-
-WITH params AS (
-    SELECT
-        %s AS player_id
-),
-player_matches AS (
-    SELECT DISTINCT fme.football_match_id AS match_id, fme.club_id AS club_id, params.player_id AS player_id
-    FROM football_match_event fme, params
-    WHERE fme.player_id = params.player_id
-)
-SELECT *
-    FROM football_match fm
-    JOIN player_matches pm ON pm.match_id = fm.id
-    WHERE (pm.club_id = fm.home_club AND fm.goal_by_away_club = 0) OR
-            (pm.club_id = fm.away_club AND fm.goal_by_home_club = 0)
-
+# Oyuncunun maç başına gol ve asist sayıları tek sorguda gruplanır
+PLAYER_MATCH_CONTRIBUTIONS_QUERY = '''
+    SELECT match_id, SUM(goals) AS goals, SUM(assists) AS assists
+    FROM (
+        SELECT g.football_match_id AS match_id, 1 AS goals, 0 AS assists
+        FROM goals g
+        WHERE g.player_id = %s AND NOT g.is_own_goal
+        UNION ALL
+        SELECT fme.football_match_id, 0, 1
+        FROM football_match_event fme
+        WHERE fme.player_id = %s AND fme.modifier = 'assist'
+    ) contributions
+    GROUP BY match_id
 '''
 
 MATCH_QUERY = '''
@@ -62,78 +54,16 @@ player_matches AS (
 
 
 
-def get_match_count(id):
-    matches = db.executeQuery(MATCH_QUERY, params=(id,))
-    result = len(matches)
-    return result
-
-
-def get_goal_count(id):
-
-    clubs = db.executeQuery('''SELECT DISTINCT fme.club_id
-                                FROM football_match_event fme
-                                WHERE fme.player_id = %s 
-                            '''
-                            , params=(id,))
-    total_goals = 0
-    for club in clubs:
-        club_goals = db.executeQuery(GOAL_QUERY, params=(club,))
-        player_goals = [goal for goal in club_goals if goal[1] == id]
-        goal_count = len(player_goals)
-        total_goals = total_goals + goal_count
-    
-    return total_goals
-
-
-def get_assist_count(id):
-    assists = db.executeQuery(PLAYER_ASSIST_QUERY, params=(id,))
-    result = len(assists)
-    return result
-
-
-def get_cln_sheet_count(id):
-    clnsht = db.executeQuery(CLN_SHEET_QUERY, params=(id,))
-    result = len(clnsht)
-    return result
-
 def load_player_image(player_id):
-    player_image = None
-    with open('app/static/images/player_images.csv', mode='r') as file:
-        for row in csv.DictReader(file):
-            dset_id = int(row['dataset_ID'])
-            if dset_id == player_id:
-                player_image = row['link']
-                break
-    return player_image
-
-
-def get_match_goal_count(id, match_id):
-        clubs = db.executeQuery('''SELECT DISTINCT fme.club_id
-                                    FROM football_match_event fme
-                                    WHERE fme.player_id = %s 
-                                '''
-                                , params=(id,))
-        if not clubs:
-            return '-'
-        
-        club = clubs [0][0]
-        club_goals = db.executeQuery(GOAL_QUERY, params=(club,))
-        player_goals = [goal for goal in club_goals if goal[1] == id and goal[0] == match_id]
-
+    return player_images.get(player_id)
 
-        if len(player_goals) == 0:
-            return '-'
-        else: return len(player_goals)
 
-def get_match_assist_count (id, match_id):
-    assists = db.executeQuery(PLAYER_ASSIST_QUERY, params=(id,))
-    if not assists:
-            return '-'
-    assist_count = sum(1 for assist in assists if assist[1] == match_id)
-
-    if assist_count == 0:
-            return '-'
-    else: return assist_count
+def get_match_contributions(id):
+    """Goals and assists of the player per match, as two {match_id: count} maps without zero entries."""
+    rows = db.executeQuery(PLAYER_MATCH_CONTRIBUTIONS_QUERY, params=(id, id))
+    match_goals = {row[0]: row[1] for row in rows if row[1]}
+    match_assists = {row[0]: row[2] for row in rows if row[2]}
+    return match_goals, match_assists
  
 player_bp = Blueprint('player', __name__, template_folder="templates")
 
@@ -220,14 +150,10 @@ def get_player(id):
 
         player_image = load_player_image(id)
 
-        match_count = get_match_count(id)
-        player_goal_count = get_goal_count(id)
-        player_assist_count = get_assist_count(id)
-        cln_sheet_count = get_cln_sheet_count(id)
+        # Kariyer toplamları player_career_stats satırlarından tek sorguda okunur
+        match_count, player_goal_count, player_assist_count, cln_sheet_count = get_career_totals(id)
         match_history = db.executeQuery(MATCH_QUERY, params=(id,))
-
-
-        print(db.executeQuery(PLAYER_ASSIST_QUERY, params=(id,)))
+        match_goals, match_assists = get_match_contributions(id)
 
     except Exception as e:
         print(f"Error fetching player details: {e}")
@@ -242,8 +168,8 @@ def get_player(id):
                                                 player_goal_count=player_goal_count,
                                                 player_assist_count=player_assist_count,
                                                 cln_sheet_count=cln_sheet_count,
-                                                get_match_goal_count=get_match_goal_count,
-                                                get_match_assist_count=get_match_assist_count)
+                                                match_goals=match_goals,
+                                                match_assists=match_assists)
 
 @player_bp.route('/add', methods=['GET', 'POST'])
 @isAdmin
@@ -264,6 +190,7 @@ def add_player():
             VALUES (%s, %s, %s, %s, %s, %s, %s);
             """
             db.executeQuery(query, params=(firstname, lastname, birthdate, country_id, position, foot, height), commit=1)
+            search_index.sync_new('player')
             flash('Player added successfully!', 'success')
             return redirect(url_for('player.get_players'))
         except Exception as e:
@@ -293,6 +220,10 @@ def edit_player(id):
             WHERE id = %s;
             """
             db.executeQuery(query, params=(firstname, lastname, birthdate, country_id, position, foot, height, id), commit=1)
+            search_index.reload('player', id)
+            update_scorer_country(id)
+            refresh_leaderboards([id])
+            match_page_cache.invalidate_tag(("player", id))
             flash('Player updated successfully!', 'success')
             return redirect(url_for('player.get_players'))
         except Exception as e:
@@ -327,6 +258,8 @@ def delete_player(id):
     try:
         query = "DELETE FROM player WHERE id = %s;"
         db.executeQuery(query, params=(id,), commit=1)
+        search_index.remove('player', id)
+        match_page_cache.invalidate_tag(("player", id))
         flash('Player deleted successfully!', 'success')
     except Exception as e:
         print(f"Error deleting player: {e}")
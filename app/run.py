@@ -1,15 +1,23 @@
-from flask import Flask, render_template
+import click
+from flask import Flask, render_template, jsonify
 from home import home_bp
 from player import player_bp
 from stadium import stadium_bp
 from country import country_bp
 from club import club_bp
-from event import event_bp
+from event import event_bp, refresh_match_data
+from event_import import import_events
 from match import match_bp
-from stats_page import match_details_bp
-from auth import auth_bp
-from search import search_bp
+from stats_page import match_details_bp, refresh_match_team_stats, refresh_player_match_appearance
+from goals import refresh_goals
+from club_summary import refresh_club_season_summary
+from leaderboards import refresh_leaderboards
+from career_stats import refresh_player_career_stats
+from auth import auth_bp, isAdmin
+from search import search_bp, search_index
+from heatmap import heatmap_bp
 from database import db
+from time import perf_counter
 
 
 def create_app():
@@ -27,10 +35,58 @@ def create_app():
     app.register_blueprint(match_details_bp)
     app.register_blueprint(auth_bp) 
     app.register_blueprint(search_bp) 
+    app.register_blueprint(heatmap_bp, url_prefix='/stats')
+
+    # Arama indeksi arka planda kurulur; hazır olana kadar /search SQL ile çalışır
+    search_index.start_build()
+
+    # Her istek kendi havuz bağlantısını kullanır, istek bitince havuza geri verilir
+    app.teardown_appcontext(db.releaseConnection)
 
     @app.route('/')
     def home():
         return render_template("base.html")
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Rebuilds the derived statistics tables for every match."""
+        refresh_goals()
+        print("goals rebuilt")
+        refresh_match_team_stats()
+        print("match_team_stats rebuilt")
+        refresh_player_match_appearance()
+        print("player_match_appearance rebuilt")
+        refresh_club_season_summary()
+        print("club_season_summary rebuilt")
+        refresh_leaderboards()
+        print("club_leaderboard and country_leaderboard rebuilt")
+        refresh_player_career_stats()
+        print("player_career_stats rebuilt")
+
+    @app.cli.command('import-events')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--strict', is_flag=True, help="Import nothing if any row is rejected.")
+    def import_events_command(path, strict):
+        """Bulk loads events from a CSV in the football_match_event column layout."""
+        with open(path, 'rb') as f:
+            report = import_events(f, strict=strict)
+        print(f"{report['total']} rows read, {report['imported']} imported, {report['rejected']} rejected "
+              f"in {report['seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/s; "
+              f"COPY {report['copy_seconds']:.2f}s, validation {report['validate_seconds']:.2f}s, "
+              f"merge {report['merge_seconds']:.2f}s)")
+        for row_number, reasons in report["rejects"]:
+            print(f"  row {row_number}: {reasons}")
+        if report["rejected"] > len(report["rejects"]):
+            print(f"  ... {report['rejected'] - len(report['rejects'])} more rejected rows")
+
+        start = perf_counter()
+        refresh_match_data(*report["matches"])
+        print(f"derived tables of {len(report['matches'])} matches refreshed in {perf_counter() - start:.2f}s")
+
+    @app.route('/metrics/db')
+    @isAdmin
+    def db_metrics():
+        return jsonify(db.getPoolMetrics())
     
     return app
 
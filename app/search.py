@@ -1,59 +1,73 @@
 from flask import Blueprint, request, jsonify
+from os import environ
 from database import db
+from search_index import SearchIndex
 
 search_bp = Blueprint('search', __name__)
 
+SEARCH_LIMIT = 10
+
+# (type, table, görünen ad, aranan metin). Aranan metin ifadeleri pg_trgm GIN indeksleriyle
+# birebir aynıdır (migrations/008_search_trigram_indexes.sql); değiştirilirse indeks de değişmeli.
+SEARCH_SOURCES = (
+    ('player', 'player', "firstname || ' ' || lastname", "firstname || ' ' || lastname"),
+    ('club', 'club', "name", "name"),
+    ('country', 'countries', "country", "country || ' ' || COALESCE(capital_city, '') || ' ' || COALESCE(region, '')"),
+    ('stadium', 'stadiums', "stadium", "stadium || ' ' || city"),
+)
+
+# Yazarken arama bellekteki indeksten yapılır; indeks hazır olana kadar SQL kullanılır
+search_index = SearchIndex(SEARCH_SOURCES, max_age=float(environ.get('SEARCH_INDEX_MAX_AGE', 300)))
+
+SEARCH_BRANCH_QUERY = '''
+    SELECT '{type}' AS type, id, {name} AS name,
+           word_similarity(%s, {haystack}) AS score,
+           similarity(%s, {name}) AS name_score
+    FROM {table}
+    WHERE ({conditions}) OR %s <%% ({haystack})
+'''
+
+
+def build_search_query(query, keywords):
+    """One candidate branch per entity type, ranked together by trigram similarity before the limit.
+
+    A row is a candidate when every keyword is a substring of its searchable text, or when the whole
+    query is word-similar to it (typos). Both predicates are served by the trigram indexes.
+    """
+    branches = []
+    params = []
+    for entity_type, table, name, haystack in SEARCH_SOURCES:
+        conditions = " AND ".join([f"({haystack}) ILIKE %s" for _ in keywords])
+        branches.append(SEARCH_BRANCH_QUERY.format(type=entity_type, table=table, name=name,
+                                                   haystack=haystack, conditions=conditions))
+        params.extend([query, query])
+        params.extend([f"%{keyword}%" for keyword in keywords])
+        params.append(query)
+
+    search_query = f"""
+    SELECT type, id, name
+    FROM ({" UNION ALL ".join(branches)}) candidates
+    ORDER BY score DESC, name_score DESC, name
+    LIMIT {SEARCH_LIMIT};
+    """
+    return search_query, params
+
+
 @search_bp.route('/search', methods=['GET'])
 def search():
     query = request.args.get('q', '').strip()
     if not query:
         return jsonify([])
 
+    results = search_index.search(query, SEARCH_LIMIT)
+    if results is not None:
+        return jsonify(results)
+
     keywords = query.split()
-    
-    player_club_conditions = " AND ".join([
-        "(firstname ILIKE %s OR lastname ILIKE %s)"
-        for _ in keywords
-    ])
-    countries_stadiums_conditions = " AND ".join([
-        "(country ILIKE %s OR capital_city ILIKE %s OR region ILIKE %s)"
-        for _ in keywords
-    ])
-    stadium_conditions = " AND ".join([
-        "(stadium ILIKE %s OR city ILIKE %s)"
-        for _ in keywords
-    ])
-    
-    search_query = f"""
-    SELECT 'player' AS type, id, firstname || ' ' || lastname AS name 
-    FROM player
-    WHERE {player_club_conditions}
-    UNION ALL
-    SELECT 'club' AS type, id, name 
-    FROM club
-    WHERE name ILIKE %s
-    UNION ALL
-    SELECT 'country' AS type, id, country 
-    FROM countries
-    WHERE {countries_stadiums_conditions}
-    UNION ALL
-    SELECT 'stadium' AS type, id, stadium 
-    FROM stadiums
-    WHERE {stadium_conditions}
-    LIMIT 10;
-    """
-    
-    params = []
-    for keyword in keywords:
-        params.extend([f"%{keyword}%", f"%{keyword}%"]) 
-    params.append(f"%{query}%")  
-    for keyword in keywords:
-        params.extend([f"%{keyword}%", f"%{keyword}%", f"%{keyword}%"])  
-    for keyword in keywords:
-        params.extend([f"%{keyword}%", f"%{keyword}%"]) 
+    search_query, params = build_search_query(query, keywords)
 
     try:
         results = db.executeQuery(search_query, params)
         return jsonify([{"type": row[0], "id": row[1], "name": row[2]} for row in results])
     except Exception as e:
-        return jsonify({"error": str(e)})
\ No newline at end of file
+        return jsonify({"error": str(e)})
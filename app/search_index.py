@@ -0,0 +1,226 @@
+import heapq
+import unicodedata
+from collections import Counter
+from threading import Lock, Thread
+from time import monotonic
+from database import db
+
+PREFIX_LENGTH = 12
+FUZZY_THRESHOLD = 0.6
+
+LOAD_QUERY = "SELECT id, {name}, {haystack} FROM {table}{where};"
+
+
+def fold(text):
+    """Lower-cased, accent-free text with punctuation turned into spaces ("Mbappé-Lottin" -> "mbappe lottin")."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return ' '.join(''.join(char if char.isalnum() else ' ' for char in text).split())
+
+
+def trigrams(folded):
+    """pg_trgm style trigrams: every word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    """In-memory autocomplete index over the /search sources.
+
+    Rows are matched like the SQL search: every keyword must be a substring of the row's
+    searchable text (word prefixes for keywords shorter than three characters), topped up with
+    rows that share enough trigrams with the whole query. Candidates come from prefix and
+    trigram posting lists, and are ranked by trigram similarity. The index is built once from
+    the tables, patched by the admin routes, and rebuilt in the background after `max_age`
+    seconds so writes made outside this process are picked up too.
+    """
+
+    def __init__(self, sources, max_age=300):
+        self.sources = {source[0]: source for source in sources}
+        self.max_age = max_age
+        self.lock = Lock()
+        self.entries = {}
+        self.prefixes = {}
+        self.grams = {}
+        self.max_ids = {}
+        self.built_at = None
+        self.building = False
+        self.pending = []
+
+    def is_ready(self):
+        return self.built_at is not None
+
+    def start_build(self):
+        """Builds the index on a background thread; /search uses SQL until it is ready."""
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+            self.pending = []
+        Thread(target=self._build, daemon=True).start()
+
+    def build(self):
+        with self.lock:
+            self.building = True
+            self.pending = []
+        self._build()
+
+    def _build(self):
+        entries, prefixes, grams, max_ids = {}, {}, {}, {}
+        try:
+            for entity_type in self.sources:
+                for row in self._load(entity_type):
+                    self._insert(entries, prefixes, grams, entity_type, *row)
+                    max_ids[entity_type] = max(max_ids.get(entity_type, 0), row[0])
+        except Exception as e:
+            print(f"Error building search index: {e}")
+            with self.lock:
+                self.building = False
+            return
+
+        with self.lock:
+            self.entries, self.prefixes, self.grams, self.max_ids = entries, prefixes, grams, max_ids
+            # Yapım sürerken gelen admin değişiklikleri yeni kopyaya da uygulanır
+            for operation, args in self.pending:
+                operation(*args)
+            self.pending = []
+            self.built_at = monotonic()
+            self.building = False
+
+    def _load(self, entity_type, where="", params=None):
+        _, table, name, haystack = self.sources[entity_type]
+        query = LOAD_QUERY.format(name=name, haystack=haystack, table=table, where=where)
+        return db.executeQuery(query, params=params) or []
+
+    def sync_new(self, entity_type):
+        """Indexes the rows added since the last build or sync (ids above the highest known one)."""
+        if not self.is_ready() and not self.building:
+            return
+        rows = self._load(entity_type, " WHERE id > %s", (self.max_ids.get(entity_type, 0),))
+        for row in rows:
+            self._apply(self._upsert, entity_type, *row)
+        if rows:
+            with self.lock:
+                self.max_ids[entity_type] = max(self.max_ids.get(entity_type, 0), max(row[0] for row in rows))
+
+    def reload(self, entity_type, id):
+        """Re-reads one row after an edit; a row that no longer exists is removed."""
+        if not self.is_ready() and not self.building:
+            return
+        rows = self._load(entity_type, " WHERE id = %s", (id,))
+        if rows:
+            self._apply(self._upsert, entity_type, *rows[0])
+        else:
+            self._apply(self._remove, entity_type, id)
+
+    def remove(self, entity_type, id):
+        if not self.is_ready() and not self.building:
+            return
+        self._apply(self._remove, entity_type, id)
+
+    def _apply(self, operation, *args):
+        with self.lock:
+            if self.building:
+                self.pending.append((operation, args))
+            operation(*args)
+
+    def _upsert(self, entity_type, id, name, haystack):
+        self._remove(entity_type, id)
+        self._insert(self.entries, self.prefixes, self.grams, entity_type, id, name, haystack)
+
+    def _remove(self, entity_type, id):
+        entry = self.entries.pop((entity_type, id), None)
+        if entry is None:
+            return
+        key = (entity_type, id)
+        for prefix in self._prefixes_of(entry["text"]):
+            self._discard(self.prefixes, prefix, key)
+        for gram in entry["grams"]:
+            self._discard(self.grams, gram, key)
+
+    @staticmethod
+    def _discard(postings, token, key):
+        keys = postings.get(token)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del postings[token]
+
+    @staticmethod
+    def _prefixes_of(text):
+        return {word[:length] for word in text.split() for length in range(1, min(len(word), PREFIX_LENGTH) + 1)}
+
+    def _insert(self, entries, prefixes, grams, entity_type, id, name, haystack):
+        key = (entity_type, id)
+        text = fold(haystack)
+        entry = {"type": entity_type, "id": id, "name": name, "text": text,
+                 "grams": trigrams(text), "name_grams": trigrams(fold(name))}
+        entries[key] = entry
+        for prefix in self._prefixes_of(text):
+            prefixes.setdefault(prefix, set()).add(key)
+        for gram in entry["grams"]:
+            grams.setdefault(gram, set()).add(key)
+
+    def search(self, query, limit=10):
+        """Best `limit` rows as {"type", "id", "name"} dicts, or None while the index is cold."""
+        if not self.is_ready():
+            return None
+        if self.max_age and not self.building and monotonic() - self.built_at > self.max_age:
+            self.start_build()
+
+        folded = fold(query)
+        keywords = folded.split()
+        if not keywords:
+            return []
+        query_grams = trigrams(folded)
+
+        with self.lock:
+            candidates = None
+            for keyword in keywords:
+                matches = self._keyword_matches(keyword)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    break
+
+            if len(candidates) < limit:
+                candidates = candidates | self._fuzzy_matches(query_grams)
+
+            entries = [self.entries[key] for key in candidates]
+
+        def rank(entry):
+            score = len(query_grams & entry["grams"]) / len(query_grams)
+            union = len(query_grams | entry["name_grams"])
+            name_score = len(query_grams & entry["name_grams"]) / union if union else 0
+            return score, name_score
+
+        best = heapq.nsmallest(limit, entries, key=lambda entry: (*(-value for value in rank(entry)), entry["name"]))
+        return [{"type": entry["type"], "id": entry["id"], "name": entry["name"]} for entry in best]
+
+    def _keyword_matches(self, keyword):
+        if len(keyword) < 3:
+            return set(self.prefixes.get(keyword, ()))
+
+        # Alt dize adayları: anahtar kelimenin tüm iç trigramlarını içeren satırlar
+        postings = [self.grams.get(keyword[i:i + 3], set()) for i in range(len(keyword) - 2)]
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting
+            if not matches:
+                break
+        return {key for key in matches if keyword in self.entries[key]["text"]}
+
+    def _fuzzy_matches(self, query_grams):
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+        needed = FUZZY_THRESHOLD * len(query_grams)
+        return {key for key, count in shared.items() if count >= needed}
+
+    def stats(self):
+        with self.lock:
+            return {"ready": self.is_ready(), "building": self.building, "entries": len(self.entries),
+                    "age": None if self.built_at is None else monotonic() - self.built_at}
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from database import db
+from stats_page import match_page_cache
+from search import search_index
 from auth import isAdmin
 
 MATCHES_QUERY = '''
@@ -140,6 +142,7 @@ def add_stadium():
             VALUES (%s, %s, %s, %s, %s);
             """
             db.executeQuery(query, params=(stadium, city, capacity, confederation, country_id), commit=1)
+            search_index.sync_new('stadium')
             flash('Stadium added successfully!', 'success')
             return redirect(url_for('stadium.get_stadiums'))
         except Exception as e:
@@ -166,6 +169,8 @@ def edit_stadium(id):
             WHERE id = %s;
             """
             db.executeQuery(query, params=(confederation, stadium, city, capacity, country_id, id), commit=1)
+            search_index.reload('stadium', id)
+            match_page_cache.invalidate_tag(("stadium", id))
             flash('Stadium updated successfully!', 'success')
             return redirect(url_for('stadium.get_stadiums'))
         except Exception as e:
@@ -203,6 +208,8 @@ def delete_stadium(id):
     try:
         query = "DELETE FROM stadiums WHERE id = %s;"
         db.executeQuery(query, params=(id,), commit=1)
+        search_index.remove('stadium', id)
+        match_page_cache.invalidate_tag(("stadium", id))
         flash('Stadium deleted successfully!', 'success')
     except Exception as e:
         print(f"Error deleting stadium: {e}")
@@ -1,14 +1,21 @@
 document.addEventListener("DOMContentLoaded", () => {
   const eventMaps = [
-    { containerID: "event-map-1", points: shots, idSuffix: "1" },
-    { containerID: "event-map-2", points: passes, idSuffix: "2" },
-    { containerID: "event-map-3", points: interceptions, idSuffix: "3" },
-    { containerID: "event-map-4", points: offsides, idSuffix: "4" },
-    { containerID: "event-map-5", points: duels, idSuffix: "5" },
-    { containerID: "event-map-6", points: fouls, idSuffix: "6" },
-    { containerID: "event-map-7", points: freekicks, idSuffix: "7" },
-    { containerID: "event-map-8", points: saves, idSuffix: "8" },
+    { containerID: "event-map-1", tabID: "event-map-tab-1", idSuffix: "1" },
+    { containerID: "event-map-2", tabID: "event-map-tab-2", idSuffix: "2" },
+    { containerID: "event-map-3", tabID: "event-map-tab-3", idSuffix: "3" },
+    { containerID: "event-map-4", tabID: "event-map-tab-4", idSuffix: "4" },
+    { containerID: "event-map-5", tabID: "event-map-tab-5", idSuffix: "5" },
+    { containerID: "event-map-6", tabID: "event-map-tab-6", idSuffix: "6" },
+    { containerID: "event-map-7", tabID: "event-map-tab-7", idSuffix: "7" },
+    { containerID: "event-map-8", tabID: "event-map-tab-8", idSuffix: "8" },
   ];
+  const loadedMaps = new Set();
+
+  // Slider, harita verisi gelmeden önce de değişebilir; son aralık burada tutulur
+  const sliderRanges = {};
+  document.addEventListener("sliderChange", (e) => {
+    sliderRanges[e.detail.containerID] = [e.detail.startValue, e.detail.endValue];
+  });
 
   function getFirstTwoDigits(input) {
     if (typeof input === "number") {
@@ -17,8 +24,59 @@ document.addEventListener("DOMContentLoaded", () => {
     return input.slice(0, 2);
   }
 
-  eventMaps.forEach(({ containerID, points, idSuffix }) => {
-    const container = document.getElementById(containerID);
+  // ?format=columnar yanıtını (alan başına bir dizi) satır listesine geri çevirir
+  function decodeColumnar({ length, players, codes, columns }) {
+    const fields = Object.keys(columns);
+    const points = new Array(length);
+    for (let i = 0; i < length; i++) {
+      const point = {};
+      fields.forEach((field) => {
+        const value = columns[field][i];
+        point[field] = field in codes ? codes[field][value] : value;
+      });
+      point.player_name = players[point.player_id];
+      points[i] = point;
+    }
+    return points;
+  }
+
+  function drawPoints(container, points) {
+    const group = container.querySelector(".event-map__points");
+    group.replaceChildren();
+    points.forEach((point, index) => {
+      const circle = document.createElementNS("http://www.w3.org/2000/svg", "circle");
+      circle.setAttribute("cx", point.x_coordinate);
+      circle.setAttribute("cy", point.y_coordinate);
+      circle.setAttribute("r", "1.5");
+      circle.setAttribute("fill", point.is_home ? "#ff6c37" : "#6c83ff");
+      circle.setAttribute("stroke", "white");
+      circle.setAttribute("stroke-width", "0.4");
+      circle.classList.add("event-map__circle");
+      circle.dataset.index = index;
+      circle.dataset.playerId = point.player_id;
+      circle.dataset.endX = point.end_x_coordinate;
+      circle.dataset.endY = point.end_y_coordinate;
+      group.appendChild(circle);
+    });
+    return group.querySelectorAll(".event-map__circle");
+  }
+
+  // Sekmenin noktaları ilk açıldığında sunucudan çekilir
+  function loadEventMap(eventMap) {
+    const container = document.getElementById(eventMap.containerID);
+    if (!container || loadedMaps.has(eventMap.containerID)) return;
+    loadedMaps.add(eventMap.containerID);
+
+    fetch(`${container.dataset.url}?format=columnar`)
+      .then((response) => {
+        if (!response.ok) throw new Error(response.statusText);
+        return response.json();
+      })
+      .then((payload) => initEventMap(eventMap, container, decodeColumnar(payload)))
+      .catch(() => loadedMaps.delete(eventMap.containerID));
+  }
+
+  function initEventMap({ containerID, idSuffix }, container, points) {
     const field = container.querySelector(".event-map__field");
     const gridChild = document.createElement("div");
     gridChild.classList.add("event-map__grid-child");
@@ -32,7 +90,7 @@ document.addEventListener("DOMContentLoaded", () => {
     const dynamicLine = container.querySelector(
       `#event-map__dynamic-line-${idSuffix}`
     );
-    const circles = container.querySelectorAll(".event-map__circle");
+    const circles = drawPoints(container, points);
 
     const infoBox = document.createElement("div");
     infoBox.classList.add("info-box");
@@ -155,8 +213,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
     let currentPointIndex = null;
 
-    let start = 0;
-    let end = 90;
+    let [start, end] = sliderRanges[containerID] || [0, 90];
 
     function updatePointDetails(index) {
       const point = points[index];
@@ -306,5 +363,16 @@ document.addEventListener("DOMContentLoaded", () => {
       }
     });
     updateVisibleShots(start, end);
+  }
+
+  document.querySelectorAll(".event-map-tab-link").forEach((tab) => {
+    tab.addEventListener("click", () => {
+      const eventMap = eventMaps.find(({ tabID }) => tabID === tab.dataset.tab);
+      if (eventMap) loadEventMap(eventMap);
+    });
   });
+
+  const activeTab = document.querySelector(".event-map-tab-link.active");
+  const activeMap = activeTab && eventMaps.find(({ tabID }) => tabID === activeTab.dataset.tab);
+  if (activeMap) loadEventMap(activeMap);
 });
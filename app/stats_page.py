@@ -1,10 +1,13 @@
-from flask import Blueprint, render_template, flash, redirect, url_for
-from collections import defaultdict
-from math import ceil, sqrt
-import csv
+from flask import Blueprint, render_template, redirect, url_for, current_app, request, jsonify, abort
+from math import ceil
+import numpy as np
 from database import db
-import json
-from match import get_matches
+from images import player_images
+from cache import LRUCache
+from timeline import get_previous_matches
+from os import environ
+from concurrent.futures import ThreadPoolExecutor, Future
+from time import perf_counter
 
 GET_MATCH_INFO_QUERY = """
     SELECT DISTINCT
@@ -19,7 +22,9 @@ GET_MATCH_INFO_QUERY = """
         fm.dateutc AS Date,
         fm.competition AS Competition,
         fm.goal_by_home_club AS "Home Team Score",
-        fm.goal_by_away_club AS "Away Team Score"
+        fm.goal_by_away_club AS "Away Team Score",
+        s.id AS "Stadium ID",
+        c.id AS "Country ID"
 
 FROM football_match_event e
 JOIN football_match fm ON e.football_match_id = fm.id
@@ -30,64 +35,97 @@ JOIN countries c ON s.country_id = c.id
 WHERE e.football_match_id = %s;
 """
 
-GET_EVENTS_QUERY = """
+GET_MATCH_EVENTS_QUERY = '''
 SELECT 
-    e.eventname,
-    e.action,
-    e.modifier,
-    e.is_success,
-    CASE WHEN e.club_id = fm.home_club THEN TRUE ELSE FALSE END AS is_home_team
+  e.id, 
+  e.club_id, 
+  e.player_id,
+  p.firstname,
+  p.lastname,
+  e.matchperiod, 
+  e.eventsec, 
+  e.eventname,
+  e.action, 
+  e.modifier, 
+  e.x_begin, 
+  e.y_begin, 
+  e.x_end, 
+  e.y_end, 
+  e.is_success,
+  CASE WHEN e.club_id = fm.home_club THEN TRUE ELSE FALSE END AS is_home_team,
+  fm.home_club,
+  fm.away_club
 FROM football_match_event e
 LEFT JOIN football_match fm ON e.football_match_id = fm.id
-WHERE 1=1
-
-"""
+LEFT JOIN player p ON p.id = e.player_id
+WHERE 
+  e.football_match_id = %s
+ORDER BY e.id
+'''
 
-GET_GOALS_QUERY = """
-WITH params AS (
-    SELECT 
-        %s AS match_id,
-        %s AS team_type 
-),
-filtered_events AS (
-    SELECT 
-		e.id, e.club_id, e.player_id,
-        e.matchperiod, e.eventsec, e.action,
-        CASE 
-            WHEN params.team_type = 0 THEN fm.home_club
-            WHEN params.team_type = 1 THEN fm.away_club
-        END AS team_id
-    FROM football_match_event e
-    LEFT JOIN football_match fm ON e.football_match_id = fm.id
-    CROSS JOIN params
-    WHERE 
-        e.football_match_id = params.match_id
-        AND e.eventname = 'Save attempt'
-        AND e.is_success = FALSE
-        AND e.club_id = CASE 
-            WHEN params.team_type = 0 THEN fm.away_club
-            WHEN params.team_type = 1 THEN fm.home_club
-        END
+MATCH_EVENT_COLUMNS = (
+    "id", "club_id", "player_id", "firstname", "lastname", "matchperiod", "eventsec", "eventname",
+    "action", "modifier", "x_begin", "y_begin", "x_end", "y_end", "is_success", "is_home",
+    "home_club", "away_club"
 )
+
+GET_METRIC_COUNTS_QUERY = '''
 SELECT 
-    e.id,
-    e.player_id,
-    p.firstname || ' ' || p.lastname AS name,
-    e.matchperiod, e.eventsec,
-    CASE 
-        WHEN fe.team_id = e.club_id THEN FALSE
-        ELSE TRUE
-    END AS is_og,
-    CASE 
-        WHEN e.action = 'Penalty' THEN TRUE
-        ELSE FALSE
-    END AS is_penalty
+    e.football_match_id,
+    CASE WHEN e.club_id = fm.home_club THEN TRUE ELSE FALSE END AS is_home_team,
+    ARRAY[
+    {columns}
+    ] AS counts
 FROM football_match_event e
-JOIN filtered_events fe ON e.id = fe.id - 1
-JOIN player p ON e.player_id = p.id
-CROSS JOIN params
-WHERE e.football_match_id = params.match_id
-"""
+LEFT JOIN football_match fm ON e.football_match_id = fm.id
+WHERE {where}
+GROUP BY e.football_match_id, is_home_team
+'''
+
+# match_team_stats, maç başına metrik sayılarını tutar; olay yazımlarında yenilenir
+REFRESH_MATCH_TEAM_STATS_QUERY = '''
+DELETE FROM match_team_stats WHERE {where};
+
+INSERT INTO match_team_stats (football_match_id, metric, home_count, away_count)
+SELECT 
+    c.football_match_id,
+    m.metric,
+    COALESCE(SUM(m.count) FILTER (WHERE c.is_home_team), 0),
+    COALESCE(SUM(m.count) FILTER (WHERE NOT c.is_home_team), 0)
+FROM ({counts_query}) c
+CROSS JOIN LATERAL unnest(%s::text[], c.counts) AS m(metric, count)
+GROUP BY c.football_match_id, m.metric
+ON CONFLICT (football_match_id, metric) DO UPDATE
+SET home_count = EXCLUDED.home_count, away_count = EXCLUDED.away_count;
+'''
+
+GET_GOALS_QUERY = '''
+SELECT g.event_id, g.player_id, p.firstname || ' ' || p.lastname, g.matchperiod, g.eventsec, g.is_own_goal, g.is_penalty
+FROM goals g
+JOIN football_match fm ON fm.id = g.football_match_id
+JOIN player p ON p.id = g.player_id
+WHERE g.football_match_id = %s
+    AND g.team_id = CASE WHEN %s = 0 THEN fm.home_club ELSE fm.away_club END
+ORDER BY g.event_id
+'''
+
+GET_CARDS_QUERY = '''
+SELECT e.player_id, p.firstname, p.lastname, e.matchperiod, e.eventsec, e.action, e.modifier
+FROM football_match_event e
+JOIN football_match fm ON fm.id = e.football_match_id
+LEFT JOIN player p ON p.id = e.player_id
+WHERE e.football_match_id = %s
+    AND e.modifier IN %s
+    AND e.player_id IS NOT NULL
+    AND e.club_id = CASE WHEN %s = 0 THEN fm.home_club ELSE fm.away_club END
+ORDER BY e.id
+'''
+
+GET_MATCH_TEAM_STATS_QUERY = '''
+SELECT metric, home_count, away_count
+FROM match_team_stats
+WHERE football_match_id = %s
+'''
 
 GET_STARTING_XI_QUERY = """
 SELECT 
@@ -101,257 +139,189 @@ SELECT
         ELSE p.position
     END AS position,
     p.country_id
-FROM 
-    (
-        SELECT DISTINCT ON (fe.player_id) 
-            fe.player_id, 
-            fe.eventsec,
-            fe.club_id
-        FROM 
-            football_match_event fe,
-            (SELECT 
-                %s AS match_id, 
-                %s AS club_type
-            ) params,
-            football_match fm
-        WHERE 
-            fe.football_match_id = params.match_id
-            AND fe.matchperiod = '1H'
-            AND fe.club_id = CASE 
-                WHEN params.club_type = 0 THEN fm.home_club
-                WHEN params.club_type = 1 THEN fm.away_club
-            END
-            AND fm.id = params.match_id
-        ORDER BY 
-            fe.player_id, fe.eventsec ASC
-    ) AS first_events
-JOIN 
-    player p ON first_events.player_id = p.id
-ORDER BY 
-    first_events.eventsec ASC
-LIMIT 11;
-
-"""
-
-GET_LAST_5_MATCHES_QUERY = """
-WITH
-    params AS (
-        SELECT 
-            %s AS match_id,  
-            %s AS club_type   
-    ),
-    target_club AS (
-        SELECT 
-            CASE 
-                WHEN params.club_type = 0 THEN fm.home_club
-                WHEN params.club_type = 1 THEN fm.away_club
-            END AS club_id,
-            fm.dateutc AS match_date
-        FROM football_match fm, params
-        WHERE fm.id = params.match_id
-    )
-SELECT 
-    fm.id AS match_id, 
-    fm.dateutc AS match_date,
-    CASE 
-        WHEN fm.home_club = target_club.club_id AND fm.winner = fm.home_club THEN 'WIN'
-        WHEN fm.away_club = target_club.club_id AND fm.winner = fm.away_club THEN 'WIN'
-        ELSE 'LOSS'
-    END AS result,
-    fm.home_club, 
-    fm.away_club, 
-    fm.goal_by_home_club, 
-    fm.goal_by_away_club
-FROM football_match fm, target_club
+FROM player_match_appearance a
+JOIN football_match fm ON fm.id = a.football_match_id
+JOIN player p ON p.id = a.player_id
 WHERE 
-    fm.dateutc < target_club.match_date
-    AND (fm.home_club = target_club.club_id OR fm.away_club = target_club.club_id)
+    a.football_match_id = %s
+    AND a.club_id = CASE WHEN %s = 0 THEN fm.home_club ELSE fm.away_club END
+    AND a.first_period = '1H'
 ORDER BY 
-    fm.dateutc DESC 
-LIMIT 5;
+    a.first_sec ASC, a.player_id
+LIMIT 11;
 """
 
-
 GET_SUBSTITUTIONS_QUERY  = """
-WITH
-    params AS (
-        SELECT 
-            %s AS match_id,  
-            %s AS club_type   
-    ),
-    club_selection AS (
-        SELECT 
-            CASE 
-                WHEN params.club_type = 0 THEN fm.home_club
-                WHEN params.club_type = 1 THEN fm.away_club
-            END AS selected_club
-        FROM football_match fm, params
-        WHERE fm.id = params.match_id
-    )
 SELECT 
     p.id AS player_id,
     p.firstname,
     p.lastname,
-    (SELECT fme.matchperiod 
-     FROM football_match_event fme, params, club_selection
-     WHERE fme.player_id = p.id 
-       AND fme.football_match_id = params.match_id
-       AND fme.club_id = club_selection.selected_club
-     ORDER BY fme.matchperiod ASC, fme.eventsec ASC
-     LIMIT 1) AS firstPeriod,
-    (SELECT fme.eventsec 
-     FROM football_match_event fme, params, club_selection
-     WHERE fme.player_id = p.id 
-       AND fme.football_match_id = params.match_id
-       AND fme.club_id = club_selection.selected_club
-     ORDER BY fme.matchperiod ASC, fme.eventsec ASC
-     LIMIT 1) AS firstSec,
-
-
-    (SELECT fme.matchperiod 
-     FROM football_match_event fme, params, club_selection
-     WHERE fme.player_id = p.id 
-       AND fme.football_match_id = params.match_id
-       AND fme.club_id = club_selection.selected_club
-     ORDER BY fme.matchperiod DESC, fme.eventsec DESC
-     LIMIT 1) AS lastPeriod,
-    (SELECT fme.eventsec 
-     FROM football_match_event fme, params, club_selection
-     WHERE fme.player_id = p.id 
-       AND fme.football_match_id = params.match_id
-       AND fme.club_id = club_selection.selected_club
-     ORDER BY fme.matchperiod DESC, fme.eventsec DESC
-     LIMIT 1) AS lastSec,
-    (SELECT fme.modifier 
-     FROM football_match_event fme, params, club_selection
-     WHERE fme.player_id = p.id 
-       AND fme.football_match_id = params.match_id
-       AND fme.club_id = club_selection.selected_club
-     ORDER BY fme.matchperiod DESC, fme.eventsec DESC
-     LIMIT 1) AS lastModifier
-FROM 
-    player p
+    a.first_period,
+    a.first_sec,
+    a.last_period,
+    a.last_sec,
+    a.last_modifier
+FROM player_match_appearance a
+JOIN football_match fm ON fm.id = a.football_match_id
+JOIN player p ON p.id = a.player_id
 WHERE 
-    EXISTS (
-        SELECT 1 
-        FROM football_match_event fme, params, club_selection
-        WHERE fme.player_id = p.id 
-          AND fme.football_match_id = params.match_id
-          AND fme.club_id = club_selection.selected_club
-          AND fme.action != 'Out of game foul'
-    );
+    a.football_match_id = %s
+    AND a.club_id = CASE WHEN %s = 0 THEN fm.home_club ELSE fm.away_club END
+    AND a.is_active
+ORDER BY p.id;
 """
 
-GET_CARDS_QUERY= """
-WITH params AS (
-    SELECT 
-        %s AS match_id,
-        %s AS club_type
-),
-club_selection AS (
-    SELECT 
-        CASE 
-            WHEN params.club_type = 0 THEN fm.home_club
-            WHEN params.club_type = 1 THEN fm.away_club
-        END AS selected_club
-    FROM football_match fm, params
-    WHERE fm.id = params.match_id
-)
-SELECT 
-    fme.player_id,
-    p.firstname,
-    p.lastname,
-    fme.matchperiod AS period,
-    fme.eventsec,
-    fme.action,
-    fme.modifier
-FROM 
-    football_match_event fme
-JOIN 
-    player p ON fme.player_id = p.id
-JOIN 
-    club_selection cs ON fme.club_id = cs.selected_club
-JOIN 
-    params ON fme.football_match_id = params.match_id
-WHERE 
-    fme.modifier IN ('red_card', 'second_yellow_card', 'yellow_card')
-"""
+# Her (maç, kulüp, oyuncu) için ilk ve son olay tek bir pencere fonksiyonu geçişinde bulunur
+REFRESH_PLAYER_MATCH_APPEARANCE_QUERY = '''
+DELETE FROM player_match_appearance WHERE {where};
 
-GET_EVENTS_BASE_QUERY = '''
-SELECT 
-  e.id, 
-  e.club_id, 
-  e.player_id,
-  p.firstname,
-  p.lastname,
-  e.matchperiod, 
-  e.eventsec, 
-  e.action, 
-  e.modifier, 
-  e.x_begin, 
-  e.y_begin, 
-  e.x_end, 
-  e.y_end, 
-  e.is_success,
-CASE WHEN e.club_id = fm.home_club THEN TRUE ELSE FALSE END AS is_home_team
-FROM football_match_event e
-LEFT JOIN football_match fm ON e.football_match_id = fm.id
-LEFT JOIN player p ON p.id = e.player_id
-WHERE 
-  e.football_match_id = %s 
+INSERT INTO player_match_appearance (football_match_id, club_id, player_id, first_period, first_sec,
+                                     last_period, last_sec, last_modifier, is_active)
+SELECT football_match_id, club_id, player_id, first_period, first_sec, last_period, last_sec, last_modifier, is_active
+FROM (
+    SELECT 
+        e.football_match_id,
+        e.club_id,
+        e.player_id,
+        e.matchperiod AS first_period,
+        e.eventsec AS first_sec,
+        first_value(e.matchperiod) OVER last_events AS last_period,
+        first_value(e.eventsec) OVER last_events AS last_sec,
+        first_value(e.modifier) OVER last_events AS last_modifier,
+        bool_or(e.action != 'Out of game foul') OVER appearance IS TRUE AS is_active,
+        row_number() OVER first_events AS event_order
+    FROM football_match_event e
+    WHERE e.player_id IS NOT NULL AND e.club_id IS NOT NULL AND {event_where}
+    WINDOW 
+        appearance AS (PARTITION BY e.football_match_id, e.club_id, e.player_id),
+        first_events AS (appearance ORDER BY e.matchperiod ASC, e.eventsec ASC, e.id ASC),
+        last_events AS (appearance ORDER BY e.matchperiod DESC, e.eventsec DESC, e.id DESC)
+) a
+WHERE event_order = 1;
 '''
 
-GET_SHOTS_QUERY = """
-  AND (eventname = 'Shot' 
-  OR action = 'Free kick shot' 
-  OR action = 'Penalty')
-"""
+CARD_MODIFIERS = ('red_card', 'second_yellow_card', 'yellow_card')
+
+# Olay haritası sekmelerinin filtreleri, eski SQL parçalarıyla aynı koşullar
+EVENT_FILTERS = {
+    'shot': lambda e: e['eventname'] == 'Shot' or e['action'] in ('Free kick shot', 'Penalty'),
+    'pass': lambda e: e['eventname'] == 'Pass',
+    'interception': lambda e: e['action'] == 'Touch' and e['modifier'] == 'interception',
+    'offside': lambda e: e['eventname'] == 'Offside',
+    'duel': lambda e: e['eventname'] == 'Duel' and e['modifier'] == 'won',
+    'foul': lambda e: e['eventname'] == 'Foul',
+    'freekick': lambda e: e['eventname'] == 'Free Kick' and e['action'] in ('Free Kick', 'Free kick shot', 'Free kick cross'),
+    'save': lambda e: e['eventname'] == 'Save attempt' and e['is_success'] is True and e['x_end'] not in (0, None) and e['y_end'] not in (0, None)
+}
 
-GET_PASSES_QUERY = """
-  AND eventname = 'Pass'
-"""
+METRICS = {
+    'Total Shots': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': None, 'is_success': None},
+    'Accurate Shots': {'eventname': 'Shot', 'action': None, 'modifier': None, 'is_success': True},
+    'Goalkeeper Saves': {'eventname': 'Save attempt', 'action': None, 'modifier': None, 'is_success': True},
+    'Corners': {'eventname': None, 'action': 'Corner', 'modifier': None, 'is_success': None},
+    'Offsides': {'eventname': 'Offside', 'action': None, 'modifier': None, 'is_success': None},
+    'Fouls': {'eventname': 'Foul', 'action': None, 'modifier': None, 'is_success': None},
+    'Passes': {'eventname': 'Pass', 'action': None, 'modifier': None, 'is_success': None},
+    'Accurate Passes': {'eventname': 'Pass', 'action': None, 'modifier': None, 'is_success': True},
+    'Free Kicks': {'eventname': 'Free Kick', 'action': ['Free Kick', 'Free kick shot', 'Free kick cross'], 'modifier': None, 'is_success': None},
+    'Throw-ins': {'eventname': 'Free Kick', 'action': 'Throw in', 'modifier': None, 'is_success': None},
+    'Yellow Cards': {'eventname': 'Foul', 'action': None, 'modifier': 'yellow_card', 'is_success': None},
+    'Red Cards': {'eventname': 'Foul', 'action': None, 'modifier': ['red_card', 'second_yellow_card'], 'is_success': None},
+    'Shots on Target': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': None, 'is_success': True},
+    'Shots Hit Post': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': ['pbr', 'pl', 'plb', 'pr', 'pt', 'ptl', 'ptr'], 'is_success': None},
+    'Missed Shots': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': ['obr', 'ol', 'olb', 'opportunity', 'or', 'ot', 'otl', 'otr'], 'is_success': None},
+    'Blocked Shots': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': ['blocked', 'interception'], 'is_success': None},
+    'Accurate Long Passes': {'eventname': 'Pass', 'action': 'High pass', 'modifier': None, 'is_success': True},
+    'Accurate Crosses': {'eventname': 'Pass', 'action': 'Cross', 'modifier': None, 'is_success': True},
+    'Key Passes': {'eventname': 'Pass', 'action': 'Smart pass', 'modifier': None, 'is_success': None},
+    'Interceptions': {'eventname': None, 'action': None, 'modifier': 'interception', 'is_success': None},
+    'Clearances': {'eventname': None, 'action': 'Clearance', 'modifier': ['counter_attack', 'dangerous_ball_lost', 'fairplay', 'interception', 'missed ball', 'own_goal'], 'is_success': None},
+    'Duel Wins': {'eventname': 'Duel', 'action': None, 'modifier': 'won', 'is_success': None}
+}
 
-GET_INTERCEPTIONS_QUERY = '''
-  AND action= 'Touch' AND modifier = 'interception'
-'''
 
-GET_OFFSIDES_QUERY = '''
-  AND eventname = 'Offside'
-'''
+def compile_metrics_query(metrics, where="e.football_match_id = %s"):
+    """Turns the metric specs into one statement with a COUNT(*) FILTER column per metric."""
+    columns = []
+    params = []
+    for metric_data in metrics.values():
+        conditions = []
+        for field in ('eventname', 'action', 'modifier', 'is_success'):
+            if metric_data[field] is None:
+                continue
+            if isinstance(metric_data[field], list):
+                conditions.append(f"e.{field} = ANY(%s)")
+            else:
+                conditions.append(f"e.{field} = %s")
+            params.append(metric_data[field])
+        columns.append(f"COUNT(*) FILTER (WHERE {' AND '.join(conditions) or 'TRUE'})")
 
-GET_DUELS_QUERY= '''
-    AND eventname = 'Duel' AND modifier= 'won'
-'''
+    return GET_METRIC_COUNTS_QUERY.format(columns=",\n    ".join(columns), where=where), params
 
-GET_FOULS_QUERY= '''
-    AND eventname = 'Foul'
-'''
 
-GET_FREEKICKS_QUERY= '''
-    AND eventname = 'Free Kick' AND (action = 'Free Kick' OR action = 'Free kick shot' OR action = 'Free kick cross')
-'''
+def refresh_match_team_stats(match_ids=None):
+    """Recomputes match_team_stats for the given matches, or for every match when None."""
+    if match_ids is None:
+        counts_query, params = compile_metrics_query(METRICS, where="e.football_match_id IS NOT NULL")
+        query = REFRESH_MATCH_TEAM_STATS_QUERY.format(where="TRUE", counts_query=counts_query)
+        params = params + [list(METRICS)]
+    else:
+        counts_query, params = compile_metrics_query(METRICS, where="e.football_match_id = ANY(%s)")
+        query = REFRESH_MATCH_TEAM_STATS_QUERY.format(where="football_match_id = ANY(%s)", counts_query=counts_query)
+        params = [list(match_ids)] + params + [list(match_ids), list(METRICS)]
 
-GET_SAVES_QUERY= '''
-    AND eventname='Save attempt' and is_success= true and (x_end !=0 and y_end != 0)
-'''
+    db.executeQuery(query, params=params, commit=1)
+
+def refresh_player_match_appearance(match_ids=None):
+    """Recomputes player_match_appearance for the given matches, or for every match when None."""
+    if match_ids is None:
+        query = REFRESH_PLAYER_MATCH_APPEARANCE_QUERY.format(where="TRUE", event_where="TRUE")
+        params = None
+    else:
+        query = REFRESH_PLAYER_MATCH_APPEARANCE_QUERY.format(where="football_match_id = ANY(%s)", event_where="e.football_match_id = ANY(%s)")
+        params = [list(match_ids), list(match_ids)]
 
+    db.executeQuery(query, params=params, commit=1)
 
 
 match_details_bp = Blueprint('match_details', __name__, template_folder="templates")
 
+# Maç sayfası bağlamı; admin düzenlemelerinde ilgili etiketlerle geçersiz kılınır
+match_page_cache = LRUCache(maxsize=int(environ.get('MATCH_CACHE_SIZE', 128)),
+                            ttl=float(environ.get('MATCH_CACHE_TTL', 600)))
+
+# Maç sayfasının birbirinden bağımsız sorguları bu havuzda paralel çalışır.
+# Worker thread'lerde app context olmadığı için her görev kendi bağlantısını havuzdan alıp geri verir.
+MATCH_PAGE_PARALLEL = environ.get('MATCH_PAGE_PARALLEL', '0') == '1'
+MATCH_PAGE_WORKERS = int(environ.get('MATCH_PAGE_WORKERS', 4))
+# İstek thread'i kendi bağlantısını tutarken worker'ları bekleyebilir; havuzda onlara yer kalmalı
+if MATCH_PAGE_PARALLEL and MATCH_PAGE_WORKERS >= db.maxconn:
+    raise ValueError(f"MATCH_PAGE_WORKERS ({MATCH_PAGE_WORKERS}) must be lower than POSTGRES_POOL_MAX ({db.maxconn})")
+match_page_executor = ThreadPoolExecutor(max_workers=MATCH_PAGE_WORKERS, thread_name_prefix='match-page') if MATCH_PAGE_PARALLEL else None
+
 
 def load_player_images(starters, subs):
     all_ids = {p["id"] for p in starters} | {p["sub_on_id"] for p in subs if "sub_on_id" in p}
-    player_data = {}
-    with open('app/static/images/player_images.csv', mode='r') as file:
-        for row in csv.DictReader(file):
-            dset_id = int(row['dataset_ID'])
-            if dset_id in all_ids:
-                player_data[dset_id] = row['link']
-    return player_data
+    return player_images.get_many(all_ids)
+
+def round_2(values):
+    """round(v, 2) over an array, with the same results as Python's round.
+
+    np.round rounds the floating-point product values * 100, which can land on the other side of a
+    .xx5 boundary than the exact value. Here the exact product is kept as hi * 100 + lo * 100 (the
+    value split into two halves so that both products are exact), compared with the boundary, and
+    exact ties go to the even neighbour as Python does.
+    """
+    split = values * 134217729.0  # 2**27 + 1
+    hi = split - (split - values)
+    lo = values - hi
+    whole = np.floor(values * 100)
+    above = (hi * 100 - (whole + 0.5)) + lo * 100
+    round_up = (above > 0) | ((above == 0) & (whole % 2 == 1))
+    return (whole + round_up) / 100
 
 def calculate_distance(x1, y1, x2, y2):
-    return round(sqrt((x2 - x1)**2 + (y2 - y1)**2), 2)
+    return round_2(np.sqrt((x2 - x1)**2 + (y2 - y1)**2))
 
 def normalize_name(name):
     if len(name) > 18:
@@ -367,6 +337,11 @@ def normalize_minute(minute):
         return int(base) + int(extra)
     return int(minute)
 
+def load_match_events(match_id):
+    """Fetches every event of the match once; the page sections are derived from this list."""
+    result = db.executeQuery(GET_MATCH_EVENTS_QUERY, params=(match_id,))
+    return [dict(zip(MATCH_EVENT_COLUMNS, row)) for row in result]
+
 def get_match_info(match_id):
     result = db.executeQuery(GET_MATCH_INFO_QUERY, params=(match_id,))
     match_info = {}
@@ -384,23 +359,24 @@ def get_match_info(match_id):
             "date": row[8],
             "league": row[9],
             "home_score": row[10],
-            "away_score": row[11]
+            "away_score": row[11],
+            "stadium_id": row[12],
+            "country_id": row[13]
         }
 
     return match_info
 
 def get_cards(match_id, is_home):
-    result = db.executeQuery(GET_CARDS_QUERY, params=(match_id, is_home))
+    result = db.executeQuery(GET_CARDS_QUERY, params=(match_id, CARD_MODIFIERS, is_home))
+
     cards = []
-    for card in result:
-        player_id, firstname, lastname, period, eventsec, action, modifier = card
-        minute = calculate_minute(period, eventsec)
+    for player_id, firstname, lastname, period, seconds, action, modifier in result:
         cards.append({
             "player_id": player_id,
             "firstname": firstname,
             "lastname": lastname,
             "period": period,
-            "minute": minute,
+            "minute": calculate_minute(period, seconds),
             "action": action,
             "modifier": modifier
         })
@@ -479,25 +455,20 @@ def calculate_minute(period, sec):
 
 
 def get_goals(match_id, is_home):
-    result = db.executeQuery(GET_GOALS_QUERY, params=(match_id, is_home))
-
-    goals = []
-    for row in result:
-        event_id, player_id, player_name, period, seconds, is_own_goal, is_penalty = row
-
-        minute = calculate_minute(period, seconds)
-        player_name = normalize_name(player_name)
+    goals = db.executeQuery(GET_GOALS_QUERY, params=(match_id, is_home))
 
-        goals.append({
+    results = []
+    for event_id, player_id, player_name, period, seconds, is_own_goal, is_penalty in goals:
+        results.append({
             "event_id": event_id,
             "player_id": player_id,
-            "player_name": player_name,
+            "player_name": normalize_name(player_name),
             "period": period,
-            "minute": minute,
+            "minute": calculate_minute(period, seconds),
             "is_own_goal": is_own_goal,
             "is_penalty": is_penalty
         })
-    return goals
+    return results
 
 
 def merge_players(xi, subs):
@@ -511,231 +482,142 @@ def merge_players(xi, subs):
     
     return merged_players
 
-def get_shot_end_coordinate(modifier, is_home):
-    end_x_coordinate =(
-        0 if is_home else
-        105
-    )
-
-    end_y_coordinate = (
-        39.5 if (modifier in ["otl", "ol", "olb"]) & is_home else
-        28.5 if (modifier in ["otr", "or", "obr"]) & is_home else
-        35.83 if (modifier in ["gtl", "gl", "glb"]) & is_home else
-        34 if (modifier in ["ot", "gt", "gc", "gb", "pt"]) & is_home else
-        32.17 if (modifier in ["gtr", "gr", "gbr"]) & is_home else
-        30.34 if (modifier in ["pbr", "pr", "ptr"]) & is_home else
-        37.66 if (modifier in ["plb", "pl", "ptl"]) & is_home else
-            
-        (68-39.5) if modifier in ["otl", "ol", "olb"] else
-        (68-29.5) if modifier in ["otr", "or", "obr"] else
-        (68-35.83) if modifier in ["gtl", "gl", "glb"] else
-        (68-34) if modifier in ["ot", "gt", "gc", "gb", "pt"] else
-        (68-32.17) if modifier in ["gtr", "gr", "gbr"] else
-        (68-30.34) if modifier in ["pbr", "pr", "ptr"] else
-        (68-37.66) if modifier in ["plb", "pl", "ptl"] else
-        -1
-    )
-
-    return end_x_coordinate, end_y_coordinate
+# Şut modifier'ına göre kale ağzındaki bitiş y koordinatı: (ev sahibi, deplasman)
+SHOT_END_Y = {modifier: (home_y, away_y) for modifiers, home_y, away_y in [
+    (["otl", "ol", "olb"], 39.5, 68-39.5),
+    (["otr", "or", "obr"], 28.5, 68-29.5),
+    (["gtl", "gl", "glb"], 35.83, 68-35.83),
+    (["ot", "gt", "gc", "gb", "pt"], 34, 68-34),
+    (["gtr", "gr", "gbr"], 32.17, 68-32.17),
+    (["pbr", "pr", "ptr"], 30.34, 68-30.34),
+    (["plb", "pl", "ptl"], 37.66, 68-37.66),
+] for modifier in modifiers}
+
+SHOT_END_MODIFIERS = {modifier: code for code, modifier in enumerate(SHOT_END_Y, start=1)}
+# Satır 0 eşleşmeyen modifier'lar içindir; sütun 0 deplasman, 1 ev sahibi. Değerler JSON'a
+# SHOT_END_Y'deki haliyle (tamsayı ya da ondalık) gitsin diye nesne olarak tutulur
+SHOT_END_Y_TABLE = np.array([[-1, -1]] + [[away_y, home_y] for home_y, away_y in SHOT_END_Y.values()], dtype=object)
+
+def get_shot_end_y(modifiers, is_home):
+    """Vectorized end y of shots: looks every modifier up in SHOT_END_Y_TABLE at once (-1 when it has no end point)."""
+    codes = np.fromiter((SHOT_END_MODIFIERS.get(modifier, 0) for modifier in modifiers), dtype=int, count=len(modifiers))
+    return SHOT_END_Y_TABLE[codes, is_home.astype(int)]
 
 def convert_coordinates(x_begin, y_begin, is_home):
+    """Maps 0-100 event coordinates of whole columns onto a 105x68 pitch, mirrored for the home side."""
     field_length, field_width = 105, 68
-    new_x = 0
-    new_y = 0
-    if is_home:
-        new_x = round((field_length - (x_begin * field_length / 100)),2)
-        new_y = round((y_begin * field_width / 100),2)
-    else:
-        new_x = round((x_begin * field_length / 100),2)
-        new_y = round((field_width - (y_begin * field_width / 100)),2)
-    return new_x, new_y
-
-def get_shots(match_id, goals):
-    query_result = db.executeQuery(GET_EVENTS_BASE_QUERY + GET_SHOTS_QUERY , params=(match_id,))
-    shots = []
-
-    for row in query_result:
-        event_id, club_id, player_id, first_name, last_name, matchperiod, eventsec, action, modifier, x_begin, y_begin, x_end, y_end, is_success, is_home = row
-
-        minute = calculate_minute(matchperiod, eventsec)
-        player_name = normalize_name(first_name + " " + last_name)
-        x_coordinate, y_coordinate = convert_coordinates(x_begin, y_begin,is_home)
-        result = ""
-        is_goal = any(goal["event_id"] == event_id for goal in goals)
-
-
-        distance = (
-            calculate_distance(x_coordinate, y_coordinate, 0, 34) if is_home else
-            calculate_distance(x_coordinate, y_coordinate, 105, 34) 
-        )
-
-        end_x_coordinate, end_y_coordinate = get_shot_end_coordinate(modifier, is_home)
-        
-        result = (
-            "Goal" if is_goal else
-            "Save" if modifier in ["gb", "gbr", "gc", "gl", "glb", "gr", "gt", "gtl", "gtr"] else
-            "Blocked" if modifier == "blocked" else
-            "Intercepted" if modifier == "interception" else
-            "Opportunity Missed" if modifier == "opportunity" else
-            "Miss" if modifier in ["obr", "ol", "olb", "or", "ot", "otl", "otr"] else
-            "Post" if modifier in ["pbr", "pl", "plb", "pr", "pt", "ptl", "ptr"] else
-            ""
-        )
-
-        situation = (
-            "Regular play" if action == "Shot" else
-            "Penalty" if action == "Penalty" else
-            "Free Kick" if action == "Free kick shot" else
-            ""
-        )
-
-        shots.append({
-            "event_id": event_id,
-            "player_id": player_id,
-            "player_name": player_name,
-            "club_id": club_id,
-            "is_home": is_home,
-            "period": matchperiod,
-            "minute": minute,
-            "action": action,
-            "modifier": modifier,
-            "x_coordinate": x_coordinate,
-            "y_coordinate": y_coordinate,
-            "is_success": is_success,
-            "end_x_coordinate": end_x_coordinate,
-            "end_y_coordinate": end_y_coordinate,
-            "distance": distance,
-            "result": result,
-            "situation": situation
-                            })
-    return shots
-
-def get_events(match_id, event_query, type):
-    query_result = db.executeQuery(GET_EVENTS_BASE_QUERY + event_query, params=(match_id,))
-    passes = []
-
-    for row in query_result:
-        event_id, club_id, player_id, first_name, last_name, matchperiod, eventsec, action, modifier, x_begin, y_begin, x_end, y_end, is_success, is_home = row
-        minute = calculate_minute(matchperiod, eventsec)
-        player_name = normalize_name(first_name + " " + last_name)
-        
-        
-        if not any(c is None for c in [x_begin, y_begin, x_end, y_end]):
-            if(type in ['offside' , 'foul']):
-                x_coordinate, y_coordinate = convert_coordinates(x_begin, y_begin,is_home)
-                end_x_coordinate, end_y_coordinate = -1, -1
-                distance = ""
-            elif(type == 'save'):
-                x_coordinate, y_coordinate = convert_coordinates(x_end, y_end,is_home)
-                end_x_coordinate, end_y_coordinate = -1, -1
-                distance = ""
-            elif(type == 'freekick' and action == 'Free kick shot'):
-                x_coordinate, y_coordinate = convert_coordinates(x_begin, y_begin,is_home)
-                end_x_coordinate, end_y_coordinate = get_shot_end_coordinate(modifier, is_home)
-                distance = (
-                calculate_distance(x_coordinate, y_coordinate, end_x_coordinate, end_y_coordinate))
-            else:
-                x_coordinate, y_coordinate = convert_coordinates(x_begin, y_begin,is_home)
-                end_x_coordinate, end_y_coordinate = convert_coordinates(x_end, y_end,is_home)
-                distance = (
-                calculate_distance(x_coordinate, y_coordinate, end_x_coordinate, end_y_coordinate)
-        )
-        else:
-            x_coordinate = -1
-            y_coordinate = -1
-            end_x_coordinate = -1
-            end_y_coordinate = -1
-            distance = ""
-
-
-
-        passes.append({
-            "event_id": event_id,
-            "player_id": player_id,
-            "player_name": player_name,
-            "club_id": club_id,
-            "is_home": is_home,
-            "period": matchperiod,
-            "minute": minute,
-            "action": action,
-            "modifier": modifier,
-            "x_coordinate": x_coordinate,
-            "y_coordinate": y_coordinate,
-            "is_success": is_success,
-            "end_x_coordinate": end_x_coordinate,
-            "end_y_coordinate": end_y_coordinate,
-            "distance": distance,
-            "result": "",
-            "situation": ""
-        })
-    return passes
-
+    new_x = np.where(is_home, field_length - (x_begin * field_length / 100), x_begin * field_length / 100)
+    new_y = np.where(is_home, y_begin * field_width / 100, field_width - (y_begin * field_width / 100))
+    return round_2(new_x), round_2(new_y)
+
+def event_columns(events, *names):
+    """Pulls the given fields of the events into float arrays (None becomes NaN)."""
+    return [np.array([event[name] for event in events], dtype=float) for name in names]
+
+def row_column(values, missing=None, fill=-1):
+    """A numeric column as a list of Python values for the JSON rows, with `fill` where `missing` is set."""
+    column = np.asarray(values).astype(object)
+    if missing is not None:
+        column[missing] = fill
+    return column.tolist()
+
+def event_rows(events, x_coordinates, y_coordinates, end_x_coordinates, end_y_coordinates, distances,
+               results=None, situations=None):
+    """Zips per-event columns into the event-map point dicts."""
+    results = results or [""] * len(events)
+    situations = situations or [""] * len(events)
+    return [{
+        "event_id": event["id"],
+        "player_id": event["player_id"],
+        "player_name": normalize_name(event["firstname"] + " " + event["lastname"]),
+        "club_id": event["club_id"],
+        "is_home": event["is_home"],
+        "period": event["matchperiod"],
+        "minute": calculate_minute(event["matchperiod"], event["eventsec"]),
+        "action": event["action"],
+        "modifier": event["modifier"],
+        "x_coordinate": x_coordinate,
+        "y_coordinate": y_coordinate,
+        "is_success": event["is_success"],
+        "end_x_coordinate": end_x_coordinate,
+        "end_y_coordinate": end_y_coordinate,
+        "distance": distance,
+        "result": result,
+        "situation": situation
+    } for event, x_coordinate, y_coordinate, end_x_coordinate, end_y_coordinate, distance, result, situation
+        in zip(events, x_coordinates, y_coordinates, end_x_coordinates, end_y_coordinates, distances, results, situations)]
+
+SHOT_RESULTS = {modifier: result for modifiers, result in [
+    (["gb", "gbr", "gc", "gl", "glb", "gr", "gt", "gtl", "gtr"], "Save"),
+    (["blocked"], "Blocked"),
+    (["interception"], "Intercepted"),
+    (["opportunity"], "Opportunity Missed"),
+    (["obr", "ol", "olb", "or", "ot", "otl", "otr"], "Miss"),
+    (["pbr", "pl", "plb", "pr", "pt", "ptl", "ptr"], "Post"),
+] for modifier in modifiers}
+
+SHOT_SITUATIONS = {"Shot": "Regular play", "Penalty": "Penalty", "Free kick shot": "Free Kick"}
+
+def get_shots(events, goals):
+    goal_ids = {goal["event_id"] for goal in goals}
+    shot_events = list(filter(EVENT_FILTERS['shot'], events))
+
+    x_begin, y_begin = event_columns(shot_events, "x_begin", "y_begin")
+    is_home = np.array([event["is_home"] for event in shot_events], dtype=bool)
+    modifiers = [event["modifier"] for event in shot_events]
+    x_coordinates, y_coordinates = convert_coordinates(x_begin, y_begin, is_home)
+    distances = calculate_distance(x_coordinates, y_coordinates, np.where(is_home, 0, 105), 34)
+    shot_end_y = get_shot_end_y(modifiers, is_home)
+    is_goal = np.array([event["id"] in goal_ids for event in shot_events], dtype=bool)
+    results = np.where(is_goal, "Goal", np.array([SHOT_RESULTS.get(modifier, "") for modifier in modifiers], dtype=object))
+
+    return event_rows(shot_events, row_column(x_coordinates), row_column(y_coordinates),
+                      row_column(np.where(is_home, 0, 105)), shot_end_y.tolist(),
+                      row_column(distances), results.tolist(),
+                      [SHOT_SITUATIONS.get(event["action"], "") for event in shot_events])
+
+def get_events(events, type):
+    type_events = list(filter(EVENT_FILTERS[type], events))
+
+    # Koordinatlar tüm satırlar için tek seferde hesaplanır, sütunlar olay tipine göre maskelerle seçilir
+    x_begin, y_begin, x_end, y_end = event_columns(type_events, "x_begin", "y_begin", "x_end", "y_end")
+    is_home = np.array([event["is_home"] for event in type_events], dtype=bool)
+    begin_x, begin_y = convert_coordinates(x_begin, y_begin, is_home)
+    end_x, end_y = convert_coordinates(x_end, y_end, is_home)
+    missing = np.isnan(x_begin + y_begin + x_end + y_end)
+
+    if type in ('offside', 'foul', 'save'):
+        x_coordinates, y_coordinates = (end_x, end_y) if type == 'save' else (begin_x, begin_y)
+        no_end = [-1] * len(type_events)
+        return event_rows(type_events, row_column(x_coordinates, missing), row_column(y_coordinates, missing),
+                          no_end, no_end, [""] * len(type_events))
+
+    # Serbest vuruştan şutlar kale ağzında biter
+    is_shot = np.array([type == 'freekick' and event["action"] == 'Free kick shot' for event in type_events], dtype=bool)
+    shot_end_x = np.where(is_home, 0, 105)
+    shot_end_y = get_shot_end_y([event["modifier"] for event in type_events], is_home)
+    distances = np.where(is_shot, calculate_distance(begin_x, begin_y, shot_end_x, shot_end_y.astype(float)),
+                         calculate_distance(begin_x, begin_y, end_x, end_y))
+
+    return event_rows(type_events, row_column(begin_x, missing), row_column(begin_y, missing),
+                      row_column(np.where(is_shot, shot_end_x.astype(object), end_x), missing),
+                      row_column(np.where(is_shot, shot_end_y, end_y), missing),
+                      row_column(distances, missing, ""))
+
+def get_metric_counts(match_id):
+    result = db.executeQuery(GET_MATCH_TEAM_STATS_QUERY, params=(match_id,))
+
+    # Satırı olmayan metrikler (olaysız maçlar dahil) sıfır sayılır; tablo init.sql ve rebuild-stats ile dolar
+    counts = {metric_name: [0, 0] for metric_name in METRICS}
+    for metric_name, home_count, away_count in result:
+        if metric_name in counts:
+            counts[metric_name] = [home_count, away_count]
+    return counts
 
 def calculate_metric_widths(match_id):
-    metrics = {
-    'Total Shots': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': None, 'is_success': None},
-    'Accurate Shots': {'eventname': 'Shot', 'action': None, 'modifier': None, 'is_success': True},
-    'Goalkeeper Saves': {'eventname': 'Save attempt', 'action': None, 'modifier': None, 'is_success': True},
-    'Corners': {'eventname': None, 'action': 'Corner', 'modifier': None, 'is_success': None},
-    'Offsides': {'eventname': 'Offside', 'action': None, 'modifier': None, 'is_success': None},
-    'Fouls': {'eventname': 'Foul', 'action': None, 'modifier': None, 'is_success': None},
-    'Passes': {'eventname': 'Pass', 'action': None, 'modifier': None, 'is_success': None},
-    'Accurate Passes': {'eventname': 'Pass', 'action': None, 'modifier': None, 'is_success': True},
-    'Free Kicks': {'eventname': 'Free Kick', 'action': ['Free Kick', 'Free kick shot', 'Free kick cross'], 'modifier': None, 'is_success': None},
-    'Throw-ins': {'eventname': 'Free Kick', 'action': 'Throw in', 'modifier': None, 'is_success': None},
-    'Yellow Cards': {'eventname': 'Foul', 'action': None, 'modifier': 'yellow_card', 'is_success': None},
-    'Red Cards': {'eventname': 'Foul', 'action': None, 'modifier': ['red_card', 'second_yellow_card'], 'is_success': None},
-    'Shots on Target': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': None, 'is_success': True},
-    'Shots Hit Post': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': ['pbr', 'pl', 'plb', 'pr', 'pt', 'ptl', 'ptr'], 'is_success': None},
-    'Missed Shots': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': ['obr', 'ol', 'olb', 'opportunity', 'or', 'ot', 'otl', 'otr'], 'is_success': None},
-    'Blocked Shots': {'eventname': None, 'action': ['Shot', 'Free kick shot', 'Penalty'], 'modifier': ['blocked', 'interception'], 'is_success': None},
-    'Accurate Long Passes': {'eventname': 'Pass', 'action': 'High pass', 'modifier': None, 'is_success': True},
-    'Accurate Crosses': {'eventname': 'Pass', 'action': 'Cross', 'modifier': None, 'is_success': True},
-    'Key Passes': {'eventname': 'Pass', 'action': 'Smart pass', 'modifier': None, 'is_success': None},
-    'Interceptions': {'eventname': None, 'action': None, 'modifier': 'interception', 'is_success': None},
-    'Clearances': {'eventname': None, 'action': 'Clearance', 'modifier': ['counter_attack', 'dangerous_ball_lost', 'fairplay', 'interception', 'missed ball', 'own_goal'], 'is_success': None},
-    'Duel Wins': {'eventname': 'Duel', 'action': None, 'modifier': 'won', 'is_success': None}
-}
-
     widths = []
 
-    for metric_name, metric_data in metrics.items():
-        conditions = []
-        query_params = []
-
-        conditions.append("AND e.football_match_id = %s")
-        query_params.append(match_id)
-
-        if metric_data['eventname'] is not None:
-            conditions.append("AND e.eventname = %s")
-            query_params.append(metric_data['eventname'])
-
-        if metric_data['action'] is not None:
-            if isinstance(metric_data['action'], list):
-                conditions.append("AND e.action = ANY(%s)")
-                query_params.append(metric_data['action'])
-            else:
-                conditions.append("AND e.action = %s")
-                query_params.append(metric_data['action'])
-
-        if metric_data['modifier'] is not None:
-            if isinstance(metric_data['modifier'], list):
-                conditions.append("AND e.modifier = ANY(%s)")
-                query_params.append(metric_data['modifier'])
-            else:
-                conditions.append("AND e.modifier = %s")
-                query_params.append(metric_data['modifier'])
-
-        if metric_data['is_success'] is not None:
-            conditions.append("AND e.is_success = %s")
-            query_params.append(metric_data['is_success'])
-
-        final_query = " ".join([GET_EVENTS_QUERY] + conditions)
-
-        result = db.executeQuery(final_query, query_params)
-
-        h_count = sum(1 for row in result if row[4])
-        a_count = sum(1 for row in result if not row[4])
+    for metric_name, (h_count, a_count) in get_metric_counts(match_id).items():
         total = h_count + a_count
 
         if total > 0:
@@ -838,12 +720,13 @@ def get_starting_XI(match_id, is_home):
     )
     return sorted_XI
 
-def get_last_5_matches(match_id, is_home):
-    matches = db.executeQuery(GET_LAST_5_MATCHES_QUERY, params=(match_id,is_home))
+def get_last_5_matches(club_id, before):
+    matches = get_previous_matches(club_id, before, 5)
 
-    results = [{'match_id': row[0], 'date': row[1], 'result': (row[2] == "WIN"),
-                     'home_id': row[3], 'away_id': row[4], 'home_goals': row[5], 'away_goals': row[6]} 
-                    for row in (matches)]
+    results = [{'match_id': match["match_id"], 'date': match["date"], 'result': match["result"],
+                     'home_id': match["home_id"], 'away_id': match["away_id"],
+                     'home_goals': match["home_goals"], 'away_goals': match["away_goals"]}
+                    for match in matches]
 
     return results
 
@@ -855,72 +738,216 @@ def get_ht_ft(home_goals, away_goals):
 
     return f"(HT {ht_home}-{ht_away}) (FT {ft_home}-{ft_away})"
 
-@match_details_bp.route('/match/<int:id>')
-def match_details(id):
-    match_info = get_match_info(id)
+def timed_section(func, *args):
+    start = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - start
+
+def submit_section(func, *args):
+    """Starts a section on match_page_executor when parallel mode is on, otherwise runs it here.
+
+    Either way the (result, elapsed seconds) pair comes back through a Future.
+    """
+    if match_page_executor is not None:
+        return match_page_executor.submit(timed_section, func, *args)
+    future = Future()
+    future.set_result(timed_section(func, *args))
+    return future
+
+def collect_sections(futures):
+    """Waits for {name: future} sections; returns the results and the time each took, keyed by name."""
+    outcomes = {name: future.result() for name, future in futures.items()}
+    results = {name: outcome[0] for name, outcome in outcomes.items()}
+    timings = {name: outcome[1] for name, outcome in outcomes.items()}
+    return results, timings
+
+# Olay haritası sekmeleri: URL'deki ad -> get_events tipi (şutlar get_shots ile ayrı hesaplanır)
+EVENT_MAP_TYPES = {
+    "passes": "pass",
+    "interceptions": "interception",
+    "offsides": "offside",
+    "duels": "duel",
+    "fouls": "foul",
+    "freekicks": "freekick",
+    "saves": "save",
+}
+EVENT_MAP_MAX_AGE = int(environ.get('EVENT_MAP_MAX_AGE', 60))
+# Sütunlu formatta tekrar eden metin alanları küçük tamsayı kodlarıyla gönderilir
+COLUMNAR_CODED_FIELDS = ("period", "action", "modifier", "result", "situation")
+
+def get_match_context(id):
+    """Runs every query of the match page and returns the template context, or None for an unknown match."""
+    start = perf_counter()
+    # Bu thread sorgular bitene kadar bağlantı tutmaz, böylece havuz dolduğunda worker'lar kilitlenmez
+    futures = {name: submit_section(*section) for name, section in {
+        "match_info": (get_match_info, id),
+        "metric_widths": (calculate_metric_widths, id),
+        "home_XI": (get_starting_XI, id, 0),
+        "away_XI": (get_starting_XI, id, 1),
+        "home_subs": (get_substitutions, id, 0),
+        "away_subs": (get_substitutions, id, 1),
+        "home_goals": (get_goals, id, 0),
+        "away_goals": (get_goals, id, 1),
+        "home_cards": (get_cards, id, 0),
+        "away_cards": (get_cards, id, 1),
+    }.items()}
+
+    # Form rehberleri maçın kulüplerine ve tarihine bağlı; diğer bölümler çalışırken başlatılır
+    match_info = futures["match_info"].result()[0]
+    if match_info != {}:
+        futures["home_last_5"] = submit_section(get_last_5_matches, match_info["home_id"], match_info["date"])
+        futures["away_last_5"] = submit_section(get_last_5_matches, match_info["away_id"], match_info["date"])
+
+    sections, timings = collect_sections(futures)
+    current_app.logger.info("match %s sections in %.1f ms (%s): %s", id, (perf_counter() - start) * 1000,
+                            "parallel" if match_page_executor is not None else "serial",
+                            ", ".join(f"{name}={elapsed * 1000:.1f}ms" for name, elapsed in timings.items()))
 
     if match_info == {}:
-         return redirect(url_for('match.get_matches'))
+        return None
 
-    event_widths = calculate_metric_widths(id)
+    event_widths = sections["metric_widths"]
     summary_widths = event_widths[:13]
     shot_widths = event_widths[13:17]
     pass_widths = event_widths[17:20]
     def_widths = event_widths[20:]
 
-    home_last_5 = get_last_5_matches(id,0)
-    away_last_5 = get_last_5_matches(id,1)
-    home_XI = get_starting_XI(id,0)
-    away_XI = get_starting_XI(id,1)
-    home_subs = get_substitutions(id, 0)
-    away_subs = get_substitutions(id, 1)
+    home_last_5 = sections["home_last_5"]
+    away_last_5 = sections["away_last_5"]
+    home_XI = sections["home_XI"]
+    away_XI = sections["away_XI"]
+    home_subs = sections["home_subs"]
+    away_subs = sections["away_subs"]
     home_players = merge_players(home_XI, home_subs)
     away_players = merge_players(away_XI, away_subs)
 
-    home_goals = get_goals(id,0)
-    away_goals = get_goals(id,1)
-    home_cards = get_cards(id, 0)
-    away_cards = get_cards(id, 1)
+    home_goals = sections["home_goals"]
+    away_goals = sections["away_goals"]
+    home_cards = sections["home_cards"]
+    away_cards = sections["away_cards"]
 
     key_events = get_key_events(home_goals, home_subs, home_cards, away_goals, away_subs, away_cards)
 
     ht_ft = get_ht_ft(home_goals, away_goals)
 
 
-    shots = get_shots(id, (home_goals + away_goals))
-    passes = get_events(id, GET_PASSES_QUERY, 'pass')
-    interceptions = get_events(id, GET_INTERCEPTIONS_QUERY, 'interception')
-    offsides = get_events(id, GET_OFFSIDES_QUERY, 'offside')
-    duels = get_events(id, GET_DUELS_QUERY, 'duel')
-    fouls = get_events(id, GET_FOULS_QUERY, 'foul')
-    freekicks = get_events(id, GET_FREEKICKS_QUERY, 'freekick')
-    saves = get_events(id, GET_SAVES_QUERY, 'save')
-
     player_images = load_player_images((home_XI + away_XI), (home_subs + away_subs))
 
-    return render_template('stats/match_stats.html',
-                           match=match_info,
-                           summary_widths=summary_widths,
-                           shot_widths=shot_widths,
-                           pass_widths=pass_widths,
-                           def_widths=def_widths,
-                           home_goals=home_goals,
-                           away_goals=away_goals,
-                           ht_ft=ht_ft,
-                           home_last_5=home_last_5,
-                           away_last_5=away_last_5,
-                           home_XI=home_XI,
-                           away_XI=away_XI,
-                           home_players= home_players,
-                           away_players= away_players,
-                           player_images=player_images,
-                           key_events=key_events,
-                           shots= shots,
-                           passes=passes,
-                           interceptions=interceptions,
-                           offsides=offsides,
-                           duels=duels,
-                           fouls=fouls,
-                           freekicks=freekicks,
-                           saves=saves
-                           )
\ No newline at end of file
+    return dict(match_id=id,
+                match=match_info,
+                summary_widths=summary_widths,
+                shot_widths=shot_widths,
+                pass_widths=pass_widths,
+                def_widths=def_widths,
+                home_goals=home_goals,
+                away_goals=away_goals,
+                ht_ft=ht_ft,
+                home_last_5=home_last_5,
+                away_last_5=away_last_5,
+                home_XI=home_XI,
+                away_XI=away_XI,
+                home_players= home_players,
+                away_players= away_players,
+                player_images=player_images,
+                key_events=key_events
+                )
+
+def get_match_context_tags(id, context):
+    """Rows the cached page depends on, as (table, id) tags for match_page_cache."""
+    match_info = context["match"]
+    tags = {("match", id), ("club", match_info["home_id"]), ("club", match_info["away_id"]),
+            ("stadium", match_info["stadium_id"]), ("country", match_info["country_id"])}
+
+    # Form rehberindeki maçlar değişirse bu sayfa da değişir
+    for form_match in context["home_last_5"] + context["away_last_5"]:
+        tags |= {("match", form_match["match_id"]), ("club", form_match["home_id"]), ("club", form_match["away_id"])}
+
+    for player in context["home_players"] + context["away_players"]:
+        tags.add(("player", player["id"]))
+    tags |= {("player", key_event["player_id"]) for key_event in context["key_events"]}
+
+    return tags
+
+@match_details_bp.route('/match/<int:id>')
+def match_details(id):
+    context = match_page_cache.get(id)
+
+    if context is None:
+        generation = match_page_cache.generation()
+        context = get_match_context(id)
+        if context is None:
+            return redirect(url_for('match.get_matches'))
+        match_page_cache.set(id, context, tags=get_match_context_tags(id, context), generation=generation)
+
+    return render_template('stats/match_stats.html', **context)
+
+def encode_columnar(points):
+    """Packs event-map points into one array per field.
+
+    Player names go out once in "players", and the COLUMNAR_CODED_FIELDS are sent as indexes
+    into their "codes" list. decodeColumnar in event_coordinates_script.js rebuilds the rows.
+    """
+    players = {point["player_id"]: point["player_name"] for point in points}
+    codes = {}
+    columns = {}
+
+    for field in (points[0] if points else ()):
+        if field == "player_name":
+            continue
+        values = [point[field] for point in points]
+        if field in COLUMNAR_CODED_FIELDS:
+            lookup = {}
+            columns[field] = [lookup.setdefault(value, len(lookup)) for value in values]
+            codes[field] = list(lookup)
+        else:
+            columns[field] = values
+
+    return {"length": len(points), "players": players, "codes": codes, "columns": columns}
+
+def get_event_map_data(id):
+    """The events and goals of a match, loaded once and shared by all of its event-map tabs."""
+    key = ("event_map", id)
+    data = match_page_cache.get(key)
+
+    if data is None:
+        generation = match_page_cache.generation()
+        data = (load_match_events(id), get_goals(id, 0) + get_goals(id, 1))
+        # Olaylar oyuncu adlarını da taşıdığı için oyuncu yazımları da bu kaydı temizler
+        tags = {("match", id)} | {("player", event["player_id"]) for event in data[0] if event["player_id"] is not None}
+        match_page_cache.set(key, data, tags=tags, generation=generation)
+
+    return data
+
+def get_event_map_points(id, kind):
+    """The points of one event-map tab of a match."""
+    events, goals = get_event_map_data(id)
+    if kind == "shots":
+        return get_shots(events, goals)
+    return get_events(events, EVENT_MAP_TYPES[kind])
+
+@match_details_bp.route('/match/<int:id>/events/<kind>')
+def match_events(id, kind):
+    """Event-map points of one tab as JSON; the match page fetches a tab when it is opened.
+
+    ?format=columnar returns the same points in the encode_columnar layout.
+    """
+    if kind != "shots" and kind not in EVENT_MAP_TYPES:
+        abort(404)
+
+    key = ("events", id, kind)
+    points = match_page_cache.get(key)
+
+    if points is None:
+        generation = match_page_cache.generation()
+        points = get_event_map_points(id, kind)
+        tags = {("match", id)} | {("player", point["player_id"]) for point in points}
+        match_page_cache.set(key, points, tags=tags, generation=generation)
+
+    if request.args.get('format') == 'columnar':
+        response = jsonify(encode_columnar(points))
+    else:
+        response = jsonify(points)
+    response.cache_control.public = True
+    response.cache_control.max_age = EVENT_MAP_MAX_AGE
+    response.add_etag()
+    return response.make_conditional(request)
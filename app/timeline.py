@@ -0,0 +1,67 @@
+from bisect import bisect_left
+from os import environ
+from database import db
+from cache import LRUCache
+
+CLUB_TIMELINE_QUERY = '''
+SELECT
+    fm.id,
+    fm.dateutc,
+    fm.home_club,
+    fm.away_club,
+    hc.name,
+    ac.name,
+    fm.goal_by_home_club,
+    fm.goal_by_away_club,
+    fm.winner
+FROM football_match fm
+LEFT JOIN club hc ON hc.id = fm.home_club
+LEFT JOIN club ac ON ac.id = fm.away_club
+WHERE fm.home_club = %s OR fm.away_club = %s
+ORDER BY fm.dateutc, fm.id
+'''
+
+# Kulüp başına tarih sırasına göre maç listesi; maç veya kulüp yazımlarında tamamen temizlenir
+timeline_cache = LRUCache(maxsize=int(environ.get('CLUB_TIMELINE_SIZE', 512)),
+                          ttl=float(environ.get('CLUB_TIMELINE_TTL', 600)))
+
+
+def get_club_timeline(club_id):
+    """Every match of the club in date order, plus the parallel list of dates used for bisecting."""
+    timeline = timeline_cache.get(club_id)
+
+    if timeline is None:
+        generation = timeline_cache.generation()
+        rows = db.executeQuery(CLUB_TIMELINE_QUERY, params=(club_id, club_id))
+        matches = [{
+            "match_id": row[0],
+            "date": row[1],
+            "home_id": row[2],
+            "away_id": row[3],
+            "home_name": row[4],
+            "away_name": row[5],
+            "home_goals": row[6],
+            "away_goals": row[7],
+            "winner": row[8],
+            "result": row[8] == club_id
+        } for row in rows]
+        timeline = ([match["date"] for match in matches], matches)
+        timeline_cache.set(club_id, timeline, generation=generation)
+
+    return timeline
+
+
+def get_previous_matches(club_id, before, count=5):
+    """The club's last `count` matches played strictly before `before`, most recent first."""
+    dates, matches = get_club_timeline(club_id)
+    end = bisect_left(dates, before)
+    return matches[max(0, end - count):end][::-1]
+
+
+def get_club_matches(club_id):
+    """Every match of the club, most recent first."""
+    return get_club_timeline(club_id)[1][::-1]
+
+
+def invalidate_timelines():
+    timeline_cache.clear()
@@ -0,0 +1,88 @@
+"""Measures the streaming event export against building the whole export in memory.
+
+Run against a populated database, from the repository root:
+
+    python benchmarks/export_benchmark.py [--formats csv ndjson] [--limits 1000 10000 0]
+
+For every format and row limit (0 exports every event) it prints the rows exported, rows per
+second and the peak Python heap (tracemalloc) of both ways. The streamed peak should stay the
+same whatever the limit, while the in-memory peak grows with the number of rows.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from io import StringIO
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import db  # noqa: E402
+from event import (EVENT_FIELDS, EVENT_LIST_QUERY, UNMATCHED_EVENT_LIST_QUERY, generate_event_export,  # noqa: E402
+                   event_to_dict)
+
+
+def measure(export):
+    """(rows, seconds, peak MiB) of `export`, which returns its row count.
+
+    It runs twice: once timed, once under tracemalloc, which would otherwise slow it down several times.
+    """
+    start = perf_counter()
+    rows = export()
+    elapsed = perf_counter() - start
+    tracemalloc.start()
+    export()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak / 2 ** 20
+
+
+def streamed(export_format, limit):
+    rows = 0
+    chunks = generate_event_export(export_format, ["TRUE"], [])
+    for chunk in chunks:
+        rows += chunk.count("\n")
+        if limit and rows >= limit:
+            chunks.close()
+            break
+    return rows - (1 if export_format == "csv" else 0)
+
+
+def in_memory(export_format, limit):
+    """The export as the list page would build it: every row fetched, then one response body."""
+    events = []
+    for query in (EVENT_LIST_QUERY, UNMATCHED_EVENT_LIST_QUERY):
+        events += db.executeQuery(query.format(conditions="TRUE") + " LIMIT %s;", (limit or None,))
+    events = events[:limit or None]
+    buffer = StringIO()
+    if export_format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(EVENT_FIELDS)
+        writer.writerows(events)
+    else:
+        for event in events:
+            buffer.write(json.dumps(event_to_dict(event), default=datetime.isoformat) + "\n")
+    body = buffer.getvalue()
+    return len(events) if body else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="*", default=["csv", "ndjson"])
+    parser.add_argument("--limits", nargs="*", type=int, default=[1000, 10000, 0])
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'limit':>9}{'rows':>10}{'stream rows/s':>15}{'peak MiB':>10}{'memory rows/s':>15}{'peak MiB':>10}")
+    for export_format in args.formats:
+        for limit in args.limits:
+            rows, stream_time, stream_peak = measure(lambda: streamed(export_format, limit))
+            _, memory_time, memory_peak = measure(lambda: in_memory(export_format, limit))
+            print(f"{export_format:<8}{limit or 'all':>9}{rows:>10}{rows / stream_time:>15,.0f}{stream_peak:>10.2f}"
+                  f"{rows / memory_time:>15,.0f}{memory_peak:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Compares the trigram-ranked /search query with the previous ILIKE UNION ALL query.
+
+Run against a database that has the migrations applied (make migrate), from the repository root:
+
+    python benchmarks/search_benchmark.py [--repeat 50] [query ...]
+
+For every search term it prints the median and p95 latency of both queries, whether the plan
+still contains a sequential scan, and the top results of each so the ranking can be compared.
+"""
+import argparse
+import os
+import statistics
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import db  # noqa: E402
+from search import build_search_query  # noqa: E402
+
+DEFAULT_QUERIES = ["messi", "ronaldo cristiano", "real madrid", "manchester", "barcelona",
+                   "london", "europe", "camp nou", "mbape", "a"]
+
+
+def build_legacy_query(query, keywords):
+    """The /search query before the trigram indexes: per-table ILIKE filters and LIMIT 10 without ranking."""
+    player_conditions = " AND ".join(["(firstname ILIKE %s OR lastname ILIKE %s)" for _ in keywords])
+    country_conditions = " AND ".join(["(country ILIKE %s OR capital_city ILIKE %s OR region ILIKE %s)" for _ in keywords])
+    stadium_conditions = " AND ".join(["(stadium ILIKE %s OR city ILIKE %s)" for _ in keywords])
+
+    search_query = f"""
+    SELECT 'player' AS type, id, firstname || ' ' || lastname AS name
+    FROM player
+    WHERE {player_conditions}
+    UNION ALL
+    SELECT 'club' AS type, id, name
+    FROM club
+    WHERE name ILIKE %s
+    UNION ALL
+    SELECT 'country' AS type, id, country
+    FROM countries
+    WHERE {country_conditions}
+    UNION ALL
+    SELECT 'stadium' AS type, id, stadium
+    FROM stadiums
+    WHERE {stadium_conditions}
+    LIMIT 10;
+    """
+
+    params = []
+    for keyword in keywords:
+        params.extend([f"%{keyword}%"] * 2)
+    params.append(f"%{query}%")
+    for keyword in keywords:
+        params.extend([f"%{keyword}%"] * 3)
+    for keyword in keywords:
+        params.extend([f"%{keyword}%"] * 2)
+    return search_query, params
+
+
+def measure(search_query, params, repeat):
+    timings = []
+    rows = None
+    for _ in range(repeat):
+        start = perf_counter()
+        rows = db.executeQuery(search_query, params)
+        timings.append((perf_counter() - start) * 1000)
+    timings.sort()
+    plan = "\n".join(row[0] for row in db.executeQuery("EXPLAIN " + search_query, params))
+    return {
+        "median": statistics.median(timings),
+        "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "seq_scan": "Seq Scan" in plan,
+        "top": [row[2] for row in rows[:3]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'query':<22}{'legacy ms':>11}{'p95':>9}{'seq':>6}{'trigram ms':>12}{'p95':>9}{'seq':>6}")
+    totals = {"legacy": 0.0, "trigram": 0.0}
+    for query in args.queries:
+        keywords = query.split()
+        legacy = measure(*build_legacy_query(query, keywords), args.repeat)
+        trigram = measure(*build_search_query(query, keywords), args.repeat)
+        totals["legacy"] += legacy["median"]
+        totals["trigram"] += trigram["median"]
+        print(f"{query:<22}{legacy['median']:>11.2f}{legacy['p95']:>9.2f}{'yes' if legacy['seq_scan'] else 'no':>6}"
+              f"{trigram['median']:>12.2f}{trigram['p95']:>9.2f}{'yes' if trigram['seq_scan'] else 'no':>6}")
+        print(f"    legacy top:  {legacy['top']}")
+        print(f"    trigram top: {trigram['top']}")
+
+    print(f"\nsum of medians: legacy {totals['legacy']:.2f} ms, trigram {totals['trigram']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
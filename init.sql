@@ -1,3 +1,5 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TABLE IF NOT EXISTS "countries" (
     "id" SERIAL PRIMARY KEY,
     "country" VARCHAR(255) NOT NULL,
@@ -63,6 +65,80 @@ CREATE TABLE IF NOT EXISTS "football_match_event" (
     "is_success" BOOLEAN
 );
 
+CREATE TABLE IF NOT EXISTS "match_team_stats" (
+    "football_match_id" INT REFERENCES "football_match"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "metric" VARCHAR(255) NOT NULL,
+    "home_count" INT NOT NULL DEFAULT 0,
+    "away_count" INT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("football_match_id", "metric")
+);
+
+CREATE TABLE IF NOT EXISTS "goals" (
+    "event_id" INT PRIMARY KEY REFERENCES "football_match_event"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "football_match_id" INT REFERENCES "football_match"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "club_id" INT,
+    "team_id" INT,
+    "matchperiod" VARCHAR(50),
+    "eventsec" FLOAT,
+    "is_own_goal" BOOLEAN NOT NULL DEFAULT FALSE,
+    "is_penalty" BOOLEAN NOT NULL DEFAULT FALSE,
+    "scorer_country_id" INT
+);
+
+CREATE TABLE IF NOT EXISTS "player_match_appearance" (
+    "football_match_id" INT REFERENCES "football_match"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "first_period" VARCHAR(50),
+    "first_sec" FLOAT,
+    "last_period" VARCHAR(50),
+    "last_sec" FLOAT,
+    "last_modifier" VARCHAR(255),
+    "is_active" BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY ("football_match_id", "club_id", "player_id")
+);
+
+CREATE TABLE IF NOT EXISTS "club_season_summary" (
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "season" SMALLINT,
+    "competition" VARCHAR(255),
+    "matches" INT NOT NULL DEFAULT 0,
+    "wins" INT NOT NULL DEFAULT 0,
+    "losses" INT NOT NULL DEFAULT 0,
+    "goals_scored" INT NOT NULL DEFAULT 0,
+    "goals_conceded" INT NOT NULL DEFAULT 0,
+    "clean_sheets" INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS "club_leaderboard" (
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "goals" INT NOT NULL DEFAULT 0,
+    "assists" INT NOT NULL DEFAULT 0,
+    "contributions" INT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("club_id", "player_id")
+);
+
+CREATE TABLE IF NOT EXISTS "country_leaderboard" (
+    "country_id" INT REFERENCES "countries"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "goals" INT NOT NULL DEFAULT 0,
+    "assists" INT NOT NULL DEFAULT 0,
+    "contributions" INT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("country_id", "player_id")
+);
+
+CREATE TABLE IF NOT EXISTS "player_career_stats" (
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "season" SMALLINT,
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "matches" INT NOT NULL DEFAULT 0,
+    "goals" INT NOT NULL DEFAULT 0,
+    "assists" INT NOT NULL DEFAULT 0,
+    "clean_sheets" INT NOT NULL DEFAULT 0
+);
+
 CREATE TABLE IF NOT EXISTS "users" (
     "user_id" SERIAL PRIMARY KEY,
     "username" VARCHAR,
@@ -73,11 +149,38 @@ CREATE TABLE IF NOT EXISTS "users" (
 
 
 CREATE INDEX idx_country_name ON countries(country);
+CREATE INDEX idx_player_name_trgm ON player USING gin ((firstname || ' ' || lastname) gin_trgm_ops);
+CREATE INDEX idx_club_name_trgm ON club USING gin (name gin_trgm_ops);
+CREATE INDEX idx_countries_search_trgm ON countries USING gin ((country || ' ' || COALESCE(capital_city, '') || ' ' || COALESCE(region, '')) gin_trgm_ops);
+CREATE INDEX idx_stadiums_search_trgm ON stadiums USING gin ((stadium || ' ' || city) gin_trgm_ops);
 CREATE INDEX idx_stadium_country_id ON stadiums(country_id);
 CREATE INDEX idx_club_stadiums_id ON club(stadiums_id);
 CREATE INDEX idx_player_country_id ON player(country_id);
 CREATE INDEX idx_football_match_stadiums_id ON football_match(stadiums_id);
-CREATE INDEX idx_event_football_match_id ON football_match_event(football_match_id);
+CREATE INDEX idx_football_match_home_club_dateutc ON football_match(home_club, dateutc);
+CREATE INDEX idx_football_match_away_club_dateutc ON football_match(away_club, dateutc);
+CREATE INDEX idx_football_match_dateutc_id ON football_match(dateutc DESC, id DESC);
+CREATE INDEX idx_event_match_eventsec_id ON football_match_event(football_match_id, eventsec, id);
+CREATE INDEX idx_event_begin_point ON football_match_event USING gist (point(x_begin, y_begin));
+CREATE INDEX idx_event_end_point ON football_match_event USING gist (point(x_end, y_end));
+CREATE INDEX idx_event_eventname ON football_match_event(eventname);
+CREATE INDEX idx_event_club_id ON football_match_event(club_id);
+CREATE INDEX idx_goals_football_match_id ON goals(football_match_id);
+CREATE INDEX idx_goals_player_id ON goals(player_id);
+CREATE INDEX idx_goals_team_id ON goals(team_id);
+CREATE INDEX idx_goals_scorer_country_id ON goals(scorer_country_id);
+CREATE INDEX idx_club_season_summary_club_id ON club_season_summary(club_id, season);
+CREATE INDEX idx_event_assist_player_id ON football_match_event(player_id) WHERE modifier = 'assist';
+CREATE INDEX idx_club_leaderboard_goals ON club_leaderboard(club_id, goals DESC, player_id);
+CREATE INDEX idx_club_leaderboard_assists ON club_leaderboard(club_id, assists DESC, player_id);
+CREATE INDEX idx_club_leaderboard_contributions ON club_leaderboard(club_id, contributions DESC, player_id);
+CREATE INDEX idx_club_leaderboard_player_id ON club_leaderboard(player_id);
+CREATE INDEX idx_country_leaderboard_goals ON country_leaderboard(country_id, goals DESC, player_id);
+CREATE INDEX idx_country_leaderboard_assists ON country_leaderboard(country_id, assists DESC, player_id);
+CREATE INDEX idx_country_leaderboard_contributions ON country_leaderboard(country_id, contributions DESC, player_id);
+CREATE INDEX idx_country_leaderboard_player_id ON country_leaderboard(player_id);
+CREATE INDEX idx_player_career_stats_player_id ON player_career_stats(player_id, season);
+CREATE INDEX idx_player_match_appearance_player_id ON player_match_appearance(player_id);
 
 COPY countries FROM '/data/csv_files/countries.csv' WITH (FORMAT csv, DELIMITER ';', HEADER true);
 COPY stadiums FROM '/data/csv_files/stadiums.csv' WITH (FORMAT csv, DELIMITER ';', HEADER true);
@@ -93,3 +196,136 @@ SELECT setval('player_id_seq', (SELECT MAX(id) FROM player));
 SELECT setval('football_match_id_seq', (SELECT MAX(id) FROM football_match));
 SELECT setval('football_match_event_id_seq', (SELECT MAX(id) FROM football_match_event));
 
+-- Home and away counts of every match page metric; the filters mirror METRICS in app/stats_page.py
+INSERT INTO match_team_stats (football_match_id, metric, home_count, away_count)
+SELECT c.football_match_id, m.metric,
+       COALESCE(SUM(m.count) FILTER (WHERE c.is_home_team), 0),
+       COALESCE(SUM(m.count) FILTER (WHERE NOT c.is_home_team), 0)
+FROM (
+    SELECT
+        e.football_match_id,
+        CASE WHEN e.club_id = fm.home_club THEN TRUE ELSE FALSE END AS is_home_team,
+        ARRAY[
+        COUNT(*) FILTER (WHERE e.action = ANY(ARRAY['Shot', 'Free kick shot', 'Penalty'])),
+        COUNT(*) FILTER (WHERE e.eventname = 'Shot' AND e.is_success = TRUE),
+        COUNT(*) FILTER (WHERE e.eventname = 'Save attempt' AND e.is_success = TRUE),
+        COUNT(*) FILTER (WHERE e.action = 'Corner'),
+        COUNT(*) FILTER (WHERE e.eventname = 'Offside'),
+        COUNT(*) FILTER (WHERE e.eventname = 'Foul'),
+        COUNT(*) FILTER (WHERE e.eventname = 'Pass'),
+        COUNT(*) FILTER (WHERE e.eventname = 'Pass' AND e.is_success = TRUE),
+        COUNT(*) FILTER (WHERE e.eventname = 'Free Kick' AND e.action = ANY(ARRAY['Free Kick', 'Free kick shot', 'Free kick cross'])),
+        COUNT(*) FILTER (WHERE e.eventname = 'Free Kick' AND e.action = 'Throw in'),
+        COUNT(*) FILTER (WHERE e.eventname = 'Foul' AND e.modifier = 'yellow_card'),
+        COUNT(*) FILTER (WHERE e.eventname = 'Foul' AND e.modifier = ANY(ARRAY['red_card', 'second_yellow_card'])),
+        COUNT(*) FILTER (WHERE e.action = ANY(ARRAY['Shot', 'Free kick shot', 'Penalty']) AND e.is_success = TRUE),
+        COUNT(*) FILTER (WHERE e.action = ANY(ARRAY['Shot', 'Free kick shot', 'Penalty']) AND e.modifier = ANY(ARRAY['pbr', 'pl', 'plb', 'pr', 'pt', 'ptl', 'ptr'])),
+        COUNT(*) FILTER (WHERE e.action = ANY(ARRAY['Shot', 'Free kick shot', 'Penalty']) AND e.modifier = ANY(ARRAY['obr', 'ol', 'olb', 'opportunity', 'or', 'ot', 'otl', 'otr'])),
+        COUNT(*) FILTER (WHERE e.action = ANY(ARRAY['Shot', 'Free kick shot', 'Penalty']) AND e.modifier = ANY(ARRAY['blocked', 'interception'])),
+        COUNT(*) FILTER (WHERE e.eventname = 'Pass' AND e.action = 'High pass' AND e.is_success = TRUE),
+        COUNT(*) FILTER (WHERE e.eventname = 'Pass' AND e.action = 'Cross' AND e.is_success = TRUE),
+        COUNT(*) FILTER (WHERE e.eventname = 'Pass' AND e.action = 'Smart pass'),
+        COUNT(*) FILTER (WHERE e.modifier = 'interception'),
+        COUNT(*) FILTER (WHERE e.action = 'Clearance' AND e.modifier = ANY(ARRAY['counter_attack', 'dangerous_ball_lost', 'fairplay', 'interception', 'missed ball', 'own_goal'])),
+        COUNT(*) FILTER (WHERE e.eventname = 'Duel' AND e.modifier = 'won')
+        ] AS counts
+    FROM football_match_event e
+    LEFT JOIN football_match fm ON e.football_match_id = fm.id
+    WHERE e.football_match_id IS NOT NULL
+    GROUP BY e.football_match_id, is_home_team
+) c
+CROSS JOIN LATERAL unnest(ARRAY['Total Shots', 'Accurate Shots', 'Goalkeeper Saves', 'Corners', 'Offsides', 'Fouls', 'Passes', 'Accurate Passes', 'Free Kicks', 'Throw-ins', 'Yellow Cards', 'Red Cards', 'Shots on Target', 'Shots Hit Post', 'Missed Shots', 'Blocked Shots', 'Accurate Long Passes', 'Accurate Crosses', 'Key Passes', 'Interceptions', 'Clearances', 'Duel Wins'], c.counts) AS m(metric, count)
+GROUP BY c.football_match_id, m.metric;
+
+
+-- Goals: the event right before a failed "Save attempt" by the conceding keeper (id - 1)
+INSERT INTO goals (event_id, football_match_id, player_id, club_id, team_id, matchperiod, eventsec, is_own_goal, is_penalty, scorer_country_id)
+SELECT
+    e.id, e.football_match_id, e.player_id, e.club_id, t.team_id, e.matchperiod, e.eventsec,
+    e.club_id IS DISTINCT FROM t.team_id, COALESCE(e.action = 'Penalty', FALSE), p.country_id
+FROM football_match_event s
+JOIN football_match fm ON fm.id = s.football_match_id
+JOIN football_match_event e ON e.id = s.id - 1 AND e.football_match_id = s.football_match_id
+JOIN player p ON p.id = e.player_id
+CROSS JOIN LATERAL (
+    SELECT CASE WHEN s.club_id = fm.away_club THEN fm.home_club ELSE fm.away_club END AS team_id
+) t
+WHERE s.eventname = 'Save attempt' AND s.is_success = FALSE AND s.club_id IN (fm.home_club, fm.away_club);
+
+-- First and last event of every player in every match, in one window pass
+INSERT INTO player_match_appearance (football_match_id, club_id, player_id, first_period, first_sec, last_period, last_sec, last_modifier, is_active)
+SELECT football_match_id, club_id, player_id, first_period, first_sec, last_period, last_sec, last_modifier, is_active
+FROM (
+    SELECT
+        e.football_match_id, e.club_id, e.player_id,
+        e.matchperiod AS first_period,
+        e.eventsec AS first_sec,
+        first_value(e.matchperiod) OVER last_events AS last_period,
+        first_value(e.eventsec) OVER last_events AS last_sec,
+        first_value(e.modifier) OVER last_events AS last_modifier,
+        bool_or(e.action != 'Out of game foul') OVER appearance IS TRUE AS is_active,
+        row_number() OVER first_events AS event_order
+    FROM football_match_event e
+    WHERE e.player_id IS NOT NULL AND e.club_id IS NOT NULL
+    WINDOW
+        appearance AS (PARTITION BY e.football_match_id, e.club_id, e.player_id),
+        first_events AS (appearance ORDER BY e.matchperiod ASC, e.eventsec ASC, e.id ASC),
+        last_events AS (appearance ORDER BY e.matchperiod DESC, e.eventsec DESC, e.id DESC)
+) a
+WHERE event_order = 1;
+
+-- Per club, season and competition totals for the club page header (draws have a NULL winner)
+INSERT INTO club_season_summary (club_id, season, competition, matches, wins, losses, goals_scored, goals_conceded, clean_sheets)
+SELECT
+    club_id, season, competition, COUNT(*),
+    COUNT(*) FILTER (WHERE winner = club_id),
+    COUNT(*) FILTER (WHERE winner <> club_id),
+    COALESCE(SUM(scored), 0), COALESCE(SUM(conceded), 0),
+    COUNT(*) FILTER (WHERE conceded = 0)
+FROM (
+    SELECT home_club AS club_id, season, competition, winner, goal_by_home_club AS scored, goal_by_away_club AS conceded FROM football_match
+    UNION ALL
+    SELECT away_club, season, competition, winner, goal_by_away_club, goal_by_home_club FROM football_match
+) sides
+WHERE club_id IS NOT NULL
+GROUP BY club_id, season, competition;
+
+-- Goals (own goals excluded) and assists per player, per club and per country
+INSERT INTO club_leaderboard (club_id, player_id, goals, assists, contributions)
+SELECT club_id, player_id, SUM(goals), SUM(assists), SUM(goals) + SUM(assists)
+FROM (
+    SELECT club_id, player_id, 1 AS goals, 0 AS assists FROM goals WHERE NOT is_own_goal
+    UNION ALL
+    SELECT club_id, player_id, 0, 1 FROM football_match_event WHERE modifier = 'assist'
+) c
+WHERE club_id IS NOT NULL AND player_id IS NOT NULL
+GROUP BY club_id, player_id;
+
+INSERT INTO country_leaderboard (country_id, player_id, goals, assists, contributions)
+SELECT p.country_id, player_id, SUM(goals), SUM(assists), SUM(goals) + SUM(assists)
+FROM (
+    SELECT club_id, player_id, 1 AS goals, 0 AS assists FROM goals WHERE NOT is_own_goal
+    UNION ALL
+    SELECT club_id, player_id, 0, 1 FROM football_match_event WHERE modifier = 'assist'
+) c
+JOIN player p ON p.id = c.player_id
+WHERE club_id IS NOT NULL AND p.country_id IS NOT NULL
+GROUP BY p.country_id, player_id;
+
+-- Matches, goals, assists and clean sheets of every player per season and club
+INSERT INTO player_career_stats (player_id, season, club_id, matches, goals, assists, clean_sheets)
+SELECT player_id, season, club_id, SUM(matches), SUM(goals), SUM(assists), SUM(clean_sheets)
+FROM (
+    SELECT a.player_id, fm.season, a.club_id, 1 AS matches, 0 AS goals, 0 AS assists,
+           CASE WHEN (a.club_id = fm.home_club AND fm.goal_by_away_club = 0)
+                  OR (a.club_id = fm.away_club AND fm.goal_by_home_club = 0) THEN 1 ELSE 0 END AS clean_sheets
+    FROM player_match_appearance a JOIN football_match fm ON fm.id = a.football_match_id
+    UNION ALL
+    SELECT g.player_id, fm.season, g.club_id, 0, 1, 0, 0
+    FROM goals g JOIN football_match fm ON fm.id = g.football_match_id WHERE NOT g.is_own_goal
+    UNION ALL
+    SELECT e.player_id, fm.season, e.club_id, 0, 0, 1, 0
+    FROM football_match_event e JOIN football_match fm ON fm.id = e.football_match_id WHERE e.modifier = 'assist'
+) career
+WHERE player_id IS NOT NULL
+GROUP BY player_id, season, club_id;
@@ -0,0 +1,12 @@
+-- Per-match team statistics behind the match page metrics. The table is created empty; fill it
+-- with `make rebuild-stats` (flask rebuild-stats) after migrating, otherwise match pages show
+-- zero counts.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "match_team_stats" (
+    "football_match_id" INT REFERENCES "football_match"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "metric" VARCHAR(255) NOT NULL,
+    "home_count" INT NOT NULL DEFAULT 0,
+    "away_count" INT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("football_match_id", "metric")
+);
@@ -0,0 +1,22 @@
+-- Goals inferred from the event data (the event right before a failed save attempt), read by the
+-- match, player, club and country pages. The table is created empty; fill it with
+-- `make rebuild-stats` (flask rebuild-stats) after migrating.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "goals" (
+    "event_id" INT PRIMARY KEY REFERENCES "football_match_event"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "football_match_id" INT REFERENCES "football_match"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "club_id" INT,
+    "team_id" INT,
+    "matchperiod" VARCHAR(50),
+    "eventsec" FLOAT,
+    "is_own_goal" BOOLEAN NOT NULL DEFAULT FALSE,
+    "is_penalty" BOOLEAN NOT NULL DEFAULT FALSE,
+    "scorer_country_id" INT
+);
+
+CREATE INDEX IF NOT EXISTS idx_goals_football_match_id ON goals (football_match_id);
+CREATE INDEX IF NOT EXISTS idx_goals_player_id ON goals (player_id);
+CREATE INDEX IF NOT EXISTS idx_goals_team_id ON goals (team_id);
+CREATE INDEX IF NOT EXISTS idx_goals_scorer_country_id ON goals (scorer_country_id);
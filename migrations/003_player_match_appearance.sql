@@ -0,0 +1,17 @@
+-- First and last event of every player in every match, behind the line-ups and substitutions of
+-- the match page. The table is created empty; fill it with `make rebuild-stats`
+-- (flask rebuild-stats) after migrating.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "player_match_appearance" (
+    "football_match_id" INT REFERENCES "football_match"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "first_period" VARCHAR(50),
+    "first_sec" FLOAT,
+    "last_period" VARCHAR(50),
+    "last_sec" FLOAT,
+    "last_modifier" VARCHAR(255),
+    "is_active" BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY ("football_match_id", "club_id", "player_id")
+);
@@ -0,0 +1,9 @@
+-- Indexes behind the per-club match timelines (form guides and club match lists), which read a
+-- club's home and away matches in date order.
+-- Safe to run more than once.
+
+CREATE INDEX IF NOT EXISTS idx_football_match_home_club_dateutc
+    ON football_match (home_club, dateutc);
+
+CREATE INDEX IF NOT EXISTS idx_football_match_away_club_dateutc
+    ON football_match (away_club, dateutc);
@@ -0,0 +1,17 @@
+-- Per club, season and competition totals behind the club page header. The table is created
+-- empty; fill it with `make rebuild-stats` (flask rebuild-stats) after migrating.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "club_season_summary" (
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "season" SMALLINT,
+    "competition" VARCHAR(255),
+    "matches" INT NOT NULL DEFAULT 0,
+    "wins" INT NOT NULL DEFAULT 0,
+    "losses" INT NOT NULL DEFAULT 0,
+    "goals_scored" INT NOT NULL DEFAULT 0,
+    "goals_conceded" INT NOT NULL DEFAULT 0,
+    "clean_sheets" INT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_club_season_summary_club_id ON club_season_summary (club_id, season);
@@ -0,0 +1,32 @@
+-- Goals, assists and contributions per player per club and per country, behind the top lists of
+-- the club and country pages. The tables are created empty; fill them with `make rebuild-stats`
+-- (flask rebuild-stats) after migrating.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "club_leaderboard" (
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "goals" INT NOT NULL DEFAULT 0,
+    "assists" INT NOT NULL DEFAULT 0,
+    "contributions" INT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("club_id", "player_id")
+);
+
+CREATE TABLE IF NOT EXISTS "country_leaderboard" (
+    "country_id" INT REFERENCES "countries"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "goals" INT NOT NULL DEFAULT 0,
+    "assists" INT NOT NULL DEFAULT 0,
+    "contributions" INT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("country_id", "player_id")
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_assist_player_id ON football_match_event (player_id) WHERE modifier = 'assist';
+CREATE INDEX IF NOT EXISTS idx_club_leaderboard_goals ON club_leaderboard (club_id, goals DESC, player_id);
+CREATE INDEX IF NOT EXISTS idx_club_leaderboard_assists ON club_leaderboard (club_id, assists DESC, player_id);
+CREATE INDEX IF NOT EXISTS idx_club_leaderboard_contributions ON club_leaderboard (club_id, contributions DESC, player_id);
+CREATE INDEX IF NOT EXISTS idx_club_leaderboard_player_id ON club_leaderboard (player_id);
+CREATE INDEX IF NOT EXISTS idx_country_leaderboard_goals ON country_leaderboard (country_id, goals DESC, player_id);
+CREATE INDEX IF NOT EXISTS idx_country_leaderboard_assists ON country_leaderboard (country_id, assists DESC, player_id);
+CREATE INDEX IF NOT EXISTS idx_country_leaderboard_contributions ON country_leaderboard (country_id, contributions DESC, player_id);
+CREATE INDEX IF NOT EXISTS idx_country_leaderboard_player_id ON country_leaderboard (player_id);
@@ -0,0 +1,17 @@
+-- Matches, goals, assists and clean sheets of every player per season and club, behind the player
+-- page header. The table is created empty; fill it with `make rebuild-stats` (flask rebuild-stats)
+-- after migrating. Needs player_match_appearance (003).
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "player_career_stats" (
+    "player_id" INT REFERENCES "player"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "season" SMALLINT,
+    "club_id" INT REFERENCES "club"("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    "matches" INT NOT NULL DEFAULT 0,
+    "goals" INT NOT NULL DEFAULT 0,
+    "assists" INT NOT NULL DEFAULT 0,
+    "clean_sheets" INT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_player_career_stats_player_id ON player_career_stats (player_id, season);
+CREATE INDEX IF NOT EXISTS idx_player_match_appearance_player_id ON player_match_appearance (player_id);
@@ -0,0 +1,17 @@
+-- Trigram indexes for /search. The indexed expressions must match SEARCH_SOURCES in app/search.py
+-- exactly, otherwise the planner cannot use them for ILIKE '%kw%' and the <% similarity operator.
+-- Safe to run more than once.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_player_name_trgm
+    ON player USING gin ((firstname || ' ' || lastname) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_club_name_trgm
+    ON club USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_countries_search_trgm
+    ON countries USING gin ((country || ' ' || COALESCE(capital_city, '') || ' ' || COALESCE(region, '')) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_stadiums_search_trgm
+    ON stadiums USING gin ((stadium || ' ' || city) gin_trgm_ops);
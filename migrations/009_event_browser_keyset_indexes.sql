@@ -0,0 +1,12 @@
+-- Indexes for the keyset-paginated event browser, which walks matches newest first and the
+-- events of each match in (eventsec, id) order. The composite event index also serves every
+-- lookup by football_match_id, so the single-column index it replaces is dropped.
+-- Safe to run more than once.
+
+CREATE INDEX IF NOT EXISTS idx_football_match_dateutc_id
+    ON football_match (dateutc DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_event_match_eventsec_id
+    ON football_match_event (football_match_id, eventsec, id);
+
+DROP INDEX IF EXISTS idx_event_football_match_id;
@@ -0,0 +1,18 @@
+-- Spatial indexes for the event browser coordinate filters. The begin and end bounds are
+-- queried as point(x, y) <@ box(...), which these GiST expression indexes serve; the btree
+-- indexes on eventname and club_id let the planner AND them with the rectangle scans.
+-- Safe to run more than once.
+
+CREATE INDEX IF NOT EXISTS idx_event_begin_point
+    ON football_match_event USING gist (point(x_begin, y_begin));
+
+CREATE INDEX IF NOT EXISTS idx_event_end_point
+    ON football_match_event USING gist (point(x_end, y_end));
+
+CREATE INDEX IF NOT EXISTS idx_event_eventname
+    ON football_match_event (eventname);
+
+CREATE INDEX IF NOT EXISTS idx_event_club_id
+    ON football_match_event (club_id);
+
+ANALYZE football_match_event;